@@ -1,5 +1,7 @@
 import requests
 from django.conf import settings
+from django.core.cache import cache
+import hashlib
 import json
 from datetime import datetime
 from .model_mappings import translate_flask_to_django, translate_django_to_flask
@@ -21,6 +23,7 @@ def _validate_jwt_token(token):
 class APIService:
     BASE_URL = getattr(settings, 'FLASK_API_URL', 'http://localhost:5000/api').rstrip('/')
     TIMEOUT = 10
+    ETAG_CACHE_TIMEOUT = 300
 
     @staticmethod
     def get_headers(jwt_token=None):
@@ -67,6 +70,22 @@ class APIService:
             except Exception:
                 pass
 
+    @staticmethod
+    def _get_with_etag(url, headers):
+        cache_key = f"api_etag:{hashlib.md5(url.encode('utf-8')).hexdigest()}"
+        cached = cache.get(cache_key)
+        if cached:
+            headers = dict(headers, **{'If-None-Match': cached[0]})
+        response = requests.get(url, headers=headers, timeout=APIService.TIMEOUT)
+        if response.status_code == 304 and cached:
+            response.close()
+            return cached[1]
+        etag = response.headers.get('ETag')
+        data = APIService._handle_response(response)
+        if etag and 'error' not in data:
+            cache.set(cache_key, (etag, data), APIService.ETAG_CACHE_TIMEOUT)
+        return data
+
     @staticmethod
     def login(email, password):
         url = f"{APIService.BASE_URL}/login/"
@@ -90,22 +109,25 @@ class APIService:
             return {'error': f'Registration failed: {str(e)}'}
 
     @staticmethod
-    def get_doctors(filters=None, jwt_token=None):
+    def get_doctors(filters=None, jwt_token=None, all_pages=False):
         url = f"{APIService.BASE_URL}/doctors/"
-        if filters:
-            query_params = '&'.join([
-                f"{_sanitize_query_param(key)}={_sanitize_query_param(value)}"
-                for key, value in filters.items() if value
-            ])
-            url = f"{url}?{query_params}"
+        filters = dict(filters or {})
+        doctors = []
         try:
-            response = requests.get(url, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
-            data = APIService._handle_response(response)
-            if 'error' in data:
-                return data
-            if 'doctors' in data:
-                data['doctors'] = [translate_flask_to_django(doctor, 'doctor') for doctor in data['doctors']]
-            return data
+            while True:
+                query_params = '&'.join([
+                    f"{_sanitize_query_param(key)}={_sanitize_query_param(value)}"
+                    for key, value in filters.items() if value
+                ])
+                page_url = f"{url}?{query_params}" if query_params else url
+                data = APIService._get_with_etag(page_url, APIService.get_headers(jwt_token))
+                if 'doctors' not in data:
+                    return data
+                doctors.extend(translate_flask_to_django(doctor, 'doctor') for doctor in data['doctors'])
+                if not all_pages or not data.get('next_cursor'):
+                    break
+                filters['cursor'] = data['next_cursor']
+            return dict(data, doctors=doctors)
         except requests.exceptions.RequestException as e:
             logger.error(f"Get doctors request failed: {str(e)}")
             return {'error': f'Failed to get doctors: {str(e)}'}
@@ -114,8 +136,7 @@ class APIService:
     def get_doctor(doctor_id, jwt_token=None):
         url = f"{APIService.BASE_URL}/doctors/{doctor_id}/"
         try:
-            response = requests.get(url, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
-            data = APIService._handle_response(response)
+            data = APIService._get_with_etag(url, APIService.get_headers(jwt_token))
             if 'doctor' in data:
                 data['doctor'] = translate_flask_to_django(data['doctor'], 'doctor')
             return data
@@ -124,19 +145,47 @@ class APIService:
             return {'error': f'Failed to get doctor: {str(e)}'}
 
     @staticmethod
-    def get_appointments(filters=None, jwt_token=None):
-        url = f"{APIService.BASE_URL}/appointments/"
-        if filters:
-            query_params = '&'.join([
-                f"{_sanitize_query_param(key)}={_sanitize_query_param(value)}"
-                for key, value in filters.items() if value
-            ])
-            url = f"{url}?{query_params}"
+    def get_changes(after=0, limit=500, jwt_token=None):
+        url = f"{APIService.BASE_URL}/changes/"
+        params = {'after': int(after), 'limit': int(limit)}
+        try:
+            response = requests.get(url, params=params, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
+            return APIService._handle_response(response)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Get changes request failed: {str(e)}")
+            return {'error': f'Failed to get changes: {str(e)}'}
+
+    @staticmethod
+    def get_doctor_schedule(doctor_id, jwt_token=None):
+        url = f"{APIService.BASE_URL}/doctors/{doctor_id}/schedule/"
         try:
             response = requests.get(url, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
-            data = APIService._handle_response(response)
-            if 'appointments' in data:
-                data['appointments'] = [translate_flask_to_django(appt, 'appointment') for appt in data['appointments']]
+            return APIService._handle_response(response)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Get doctor schedule request failed: {str(e)}")
+            return {'error': f'Failed to get doctor schedule: {str(e)}'}
+
+    @staticmethod
+    def get_appointments(filters=None, jwt_token=None, all_pages=False):
+        url = f"{APIService.BASE_URL}/appointments/"
+        filters = dict(filters or {})
+        appointments = []
+        try:
+            while True:
+                query_params = '&'.join([
+                    f"{_sanitize_query_param(key)}={_sanitize_query_param(value)}"
+                    for key, value in filters.items() if value
+                ])
+                page_url = f"{url}?{query_params}" if query_params else url
+                response = requests.get(page_url, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
+                data = APIService._handle_response(response)
+                if 'appointments' not in data:
+                    return data
+                appointments.extend(translate_flask_to_django(appt, 'appointment') for appt in data['appointments'])
+                if not all_pages or not data.get('next_cursor'):
+                    break
+                filters['cursor'] = data['next_cursor']
+            data['appointments'] = appointments
             return data
         except requests.exceptions.RequestException as e:
             logger.error(f"Get appointments request failed: {str(e)}")
@@ -183,6 +232,16 @@ class APIService:
             print(f"Unexpected Error: {str(e)}")
             return {'error': f"An unexpected error occurred: {str(e)}"}
 
+    @staticmethod
+    def create_appointments_bulk(appointments, jwt_token):
+        url = f"{APIService.BASE_URL}/appointments/bulk/"
+        try:
+            response = requests.post(url, json={'appointments': appointments}, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
+            return APIService._handle_response(response)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Bulk create appointments request failed: {str(e)}")
+            return {'error': f'Failed to create appointments: {str(e)}'}
+
     @staticmethod
     def update_appointment(appointment_id, appointment_data, jwt_token=None):
         url = f"{APIService.BASE_URL}/appointments/{appointment_id}/"
@@ -222,4 +281,45 @@ class APIService:
             return APIService._handle_response(response)
         except requests.exceptions.RequestException as e:
             logger.error(f"Get available slots request failed: {str(e)}")
-            return {'error': f'Failed to get available slots: {str(e)}'} 
\ No newline at end of file
+            return {'error': f'Failed to get available slots: {str(e)}'}
+
+    @staticmethod
+    def get_availability(start_date, end_date=None, doctor_ids=None, specialization=None, jwt_token=None):
+        try:
+            datetime.strptime(start_date, '%Y-%m-%d')
+            if end_date:
+                datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            logger.error('Invalid date format for availability. Use YYYY-MM-DD.')
+            return {'error': 'Invalid date format. Use YYYY-MM-DD.'}
+        url = f"{APIService.BASE_URL}/availability/"
+        params = {'start': start_date, 'end': end_date or start_date}
+        if doctor_ids:
+            params['doctor_ids'] = ','.join(str(int(doctor_id)) for doctor_id in doctor_ids)
+        elif specialization:
+            params['specialization'] = specialization
+        try:
+            response = requests.get(url, params=params, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
+            return APIService._handle_response(response)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Get availability request failed: {str(e)}")
+            return {'error': f'Failed to get availability: {str(e)}'}
+
+    @staticmethod
+    def get_first_available(specialization=None, city=None, limit=10, start_date=None, jwt_token=None):
+        if not specialization and not city:
+            return {'error': 'specialization or city is required'}
+        url = f"{APIService.BASE_URL}/availability/first/"
+        params = {'limit': int(limit)}
+        if specialization:
+            params['specialization'] = specialization
+        if city:
+            params['city'] = city
+        if start_date:
+            params['from'] = start_date
+        try:
+            response = requests.get(url, params=params, headers=APIService.get_headers(jwt_token), timeout=APIService.TIMEOUT)
+            return APIService._handle_response(response)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Get first available slots request failed: {str(e)}")
+            return {'error': f'Failed to get first available slots: {str(e)}'}
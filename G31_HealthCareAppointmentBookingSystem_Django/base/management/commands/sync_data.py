@@ -1,3 +1,6 @@
+import os
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from doctor.models import Doctor
@@ -9,6 +12,9 @@ import requests
 
 logger = logging.getLogger('api_service')
 
+# Change feed entity names for each --model choice
+FEED_ENTITIES = {'doctor': 'doctor', 'patient': 'user', 'appointment': 'appointment'}
+
 class Command(BaseCommand):
     help = 'Synchronize data between Flask and Django models'
 
@@ -35,6 +41,17 @@ class Command(BaseCommand):
             type=str,
             help='Flask API URL (defaults to settings.FLASK_API_URL)'
         )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Pull full snapshots instead of the changes since the last checkpoint'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=os.path.join(settings.BASE_DIR, '.sync_checkpoint'),
+            help='Path prefix of the per-model files holding the sequence number of the last applied change'
+        )
 
     def handle(self, *args, **options):
         # Get admin credentials
@@ -75,6 +92,9 @@ class Command(BaseCommand):
         
         # Sync based on model choice
         model = options['model']
+        if not options['full']:
+            self.sync_changes(jwt_token, model, options['checkpoint'])
+            return
         if model in ['doctor', 'all']:
             self.sync_doctors(jwt_token)
         if model in ['patient', 'all']:
@@ -89,52 +109,55 @@ class Command(BaseCommand):
         self.stdout.write('Syncing doctors...')
         
         try:
-            api_response = APIService.get_doctors(jwt_token=jwt_token)
+            api_response = APIService.get_doctors(jwt_token=jwt_token, all_pages=True)
             doctors = api_response.get('doctors', [])
             
             for flask_doctor in doctors:
-                # Get or create user
-                user, created = User.objects.get_or_create(
-                    username=flask_doctor.get('username'),
-                    defaults={
-                        'email': flask_doctor.get('email', ''),
-                        'first_name': flask_doctor.get('first_name', ''),
-                        'last_name': flask_doctor.get('last_name', ''),
-                        'user_type': 'Doctor'
-                    }
-                )
-                
-                # Get or create doctor
-                doctor, created = Doctor.objects.get_or_create(
-                    user=user,
-                    defaults={
-                        'full_name': flask_doctor.get('full_name', ''),
-                        'mobile': flask_doctor.get('mobile', ''),
-                        'country': flask_doctor.get('country', ''),
-                        'bio': flask_doctor.get('bio', ''),
-                        'specialization': flask_doctor.get('specialization', ''),
-                        'qualifications': flask_doctor.get('qualifications', ''),
-                        'years_of_experience': flask_doctor.get('years_of_experience', '')
-                    }
-                )
-                
-                if not created:
-                    # Update existing doctor
-                    doctor.full_name = flask_doctor.get('full_name', doctor.full_name)
-                    doctor.mobile = flask_doctor.get('mobile', doctor.mobile)
-                    doctor.country = flask_doctor.get('country', doctor.country)
-                    doctor.bio = flask_doctor.get('bio', doctor.bio)
-                    doctor.specialization = flask_doctor.get('specialization', doctor.specialization)
-                    doctor.qualifications = flask_doctor.get('qualifications', doctor.qualifications)
-                    doctor.years_of_experience = flask_doctor.get('years_of_experience', doctor.years_of_experience)
-                    doctor.save()
-                
-                self.stdout.write(f"Synced doctor: {doctor.full_name}")
+                self.sync_doctor(flask_doctor)
         
         except Exception as e:
             logger.error(f"Error syncing doctors: {str(e)}")
             self.stdout.write(self.style.ERROR(f'Error syncing doctors: {str(e)}'))
 
+    def sync_doctor(self, flask_doctor):
+        # Get or create user
+        user, created = User.objects.get_or_create(
+            username=flask_doctor.get('username'),
+            defaults={
+                'email': flask_doctor.get('email', ''),
+                'first_name': flask_doctor.get('first_name', ''),
+                'last_name': flask_doctor.get('last_name', ''),
+                'user_type': 'Doctor'
+            }
+        )
+
+        # Get or create doctor
+        doctor, created = Doctor.objects.get_or_create(
+            user=user,
+            defaults={
+                'full_name': flask_doctor.get('full_name', ''),
+                'mobile': flask_doctor.get('mobile', ''),
+                'country': flask_doctor.get('country', ''),
+                'bio': flask_doctor.get('bio', ''),
+                'specialization': flask_doctor.get('specialization', ''),
+                'qualifications': flask_doctor.get('qualifications', ''),
+                'years_of_experience': flask_doctor.get('years_of_experience', '')
+            }
+        )
+
+        if not created:
+            # Update existing doctor
+            doctor.full_name = flask_doctor.get('full_name', doctor.full_name)
+            doctor.mobile = flask_doctor.get('mobile', doctor.mobile)
+            doctor.country = flask_doctor.get('country', doctor.country)
+            doctor.bio = flask_doctor.get('bio', doctor.bio)
+            doctor.specialization = flask_doctor.get('specialization', doctor.specialization)
+            doctor.qualifications = flask_doctor.get('qualifications', doctor.qualifications)
+            doctor.years_of_experience = flask_doctor.get('years_of_experience', doctor.years_of_experience)
+            doctor.save()
+
+        self.stdout.write(f"Synced doctor: {doctor.full_name}")
+
     def sync_patients(self, jwt_token):
         """Sync patients from Flask API to Django database"""
         self.stdout.write('Syncing patients...')
@@ -144,90 +167,166 @@ class Command(BaseCommand):
             patients = api_response.get('patients', [])
             
             for flask_patient in patients:
-                # Get or create user
-                user, created = User.objects.get_or_create(
-                    username=flask_patient.get('username'),
-                    defaults={
-                        'email': flask_patient.get('email', ''),
-                        'first_name': flask_patient.get('first_name', ''),
-                        'last_name': flask_patient.get('last_name', ''),
-                        'user_type': 'Patient'
-                    }
-                )
-                
-                # Get or create patient
-                patient, created = Patient.objects.get_or_create(
-                    user=user,
-                    defaults={
-                        'full_name': flask_patient.get('full_name', ''),
-                        'email': flask_patient.get('email', ''),
-                        'mobile': flask_patient.get('mobile', ''),
-                        'address': flask_patient.get('address', ''),
-                        'gender': flask_patient.get('gender', ''),
-                        'dob': flask_patient.get('date_of_birth'),
-                        'blood_group': flask_patient.get('blood_group', '')
-                    }
-                )
-                
-                if not created:
-                    # Update existing patient
-                    patient.full_name = flask_patient.get('full_name', patient.full_name)
-                    patient.email = flask_patient.get('email', patient.email)
-                    patient.mobile = flask_patient.get('mobile', patient.mobile)
-                    patient.address = flask_patient.get('address', patient.address)
-                    patient.gender = flask_patient.get('gender', patient.gender)
-                    patient.dob = flask_patient.get('date_of_birth', patient.dob)
-                    patient.blood_group = flask_patient.get('blood_group', patient.blood_group)
-                    patient.save()
-                
-                self.stdout.write(f"Synced patient: {patient.full_name}")
+                self.sync_patient(flask_patient)
         
         except Exception as e:
             logger.error(f"Error syncing patients: {str(e)}")
             self.stdout.write(self.style.ERROR(f'Error syncing patients: {str(e)}'))
 
+    def sync_patient(self, flask_patient):
+        # Get or create user
+        user, created = User.objects.get_or_create(
+            username=flask_patient.get('username'),
+            defaults={
+                'email': flask_patient.get('email', ''),
+                'first_name': flask_patient.get('first_name', ''),
+                'last_name': flask_patient.get('last_name', ''),
+                'user_type': 'Patient'
+            }
+        )
+
+        # Get or create patient
+        patient, created = Patient.objects.get_or_create(
+            user=user,
+            defaults={
+                'full_name': flask_patient.get('full_name', ''),
+                'email': flask_patient.get('email', ''),
+                'mobile': flask_patient.get('mobile', ''),
+                'address': flask_patient.get('address', ''),
+                'gender': flask_patient.get('gender', ''),
+                'dob': flask_patient.get('date_of_birth'),
+                'blood_group': flask_patient.get('blood_group', '')
+            }
+        )
+
+        if not created:
+            # Update existing patient
+            patient.full_name = flask_patient.get('full_name', patient.full_name)
+            patient.email = flask_patient.get('email', patient.email)
+            patient.mobile = flask_patient.get('mobile', patient.mobile)
+            patient.address = flask_patient.get('address', patient.address)
+            patient.gender = flask_patient.get('gender', patient.gender)
+            patient.dob = flask_patient.get('date_of_birth', patient.dob)
+            patient.blood_group = flask_patient.get('blood_group', patient.blood_group)
+            patient.save()
+
+        self.stdout.write(f"Synced patient: {patient.full_name}")
+
     def sync_appointments(self, jwt_token):
         """Sync appointments from Flask API to Django database"""
         self.stdout.write('Syncing appointments...')
         
         try:
-            api_response = APIService.get_appointments(jwt_token=jwt_token)
+            api_response = APIService.get_appointments(jwt_token=jwt_token, all_pages=True)
             appointments = api_response.get('appointments', [])
             
             for flask_appointment in appointments:
-                # Get related models
-                doctor = Doctor.objects.filter(user__username=flask_appointment.get('doctor_username')).first()
-                patient = Patient.objects.filter(user__username=flask_appointment.get('patient_username')).first()
-                
-                if not doctor or not patient:
-                    logger.warning(f"Skipping appointment: Doctor or patient not found")
-                    continue
-                
-                # Get or create appointment
-                appointment, created = Appointment.objects.get_or_create(
-                    appointment_id=flask_appointment.get('id'),
-                    defaults={
-                        'doctor': doctor,
-                        'patient': patient,
-                        'appointment_date': flask_appointment.get('appointment_date'),
-                        'issues': flask_appointment.get('issues', ''),
-                        'symptoms': flask_appointment.get('symptoms', ''),
-                        'status': flask_appointment.get('status', 'Pending')
-                    }
-                )
-                
-                if not created:
-                    # Update existing appointment
-                    appointment.doctor = doctor
-                    appointment.patient = patient
-                    appointment.appointment_date = flask_appointment.get('appointment_date', appointment.appointment_date)
-                    appointment.issues = flask_appointment.get('issues', appointment.issues)
-                    appointment.symptoms = flask_appointment.get('symptoms', appointment.symptoms)
-                    appointment.status = flask_appointment.get('status', appointment.status)
-                    appointment.save()
-                
-                self.stdout.write(f"Synced appointment: {appointment.appointment_id}")
+                self.sync_appointment(flask_appointment)
         
         except Exception as e:
             logger.error(f"Error syncing appointments: {str(e)}")
-            self.stdout.write(self.style.ERROR(f'Error syncing appointments: {str(e)}')) 
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f'Error syncing appointments: {str(e)}'))
+
+    def sync_appointment(self, flask_appointment):
+        # Get related models
+        doctor = Doctor.objects.filter(user__username=flask_appointment.get('doctor_username')).first()
+        patient = Patient.objects.filter(user__username=flask_appointment.get('patient_username')).first()
+
+        if not doctor or not patient:
+            logger.warning(f"Skipping appointment: Doctor or patient not found")
+            return
+
+        # Get or create appointment
+        appointment, created = Appointment.objects.get_or_create(
+            appointment_id=flask_appointment.get('id'),
+            defaults={
+                'doctor': doctor,
+                'patient': patient,
+                'appointment_date': flask_appointment.get('appointment_date'),
+                'issues': flask_appointment.get('issues', ''),
+                'symptoms': flask_appointment.get('symptoms', ''),
+                'status': flask_appointment.get('status', 'Pending')
+            }
+        )
+
+        if not created:
+            # Update existing appointment
+            appointment.doctor = doctor
+            appointment.patient = patient
+            appointment.appointment_date = flask_appointment.get('appointment_date', appointment.appointment_date)
+            appointment.issues = flask_appointment.get('issues', appointment.issues)
+            appointment.symptoms = flask_appointment.get('symptoms', appointment.symptoms)
+            appointment.status = flask_appointment.get('status', appointment.status)
+            appointment.save()
+
+        self.stdout.write(f"Synced appointment: {appointment.appointment_id}")
+
+    def sync_changes(self, jwt_token, model, checkpoint_path):
+        """Apply the Flask change feed from the last checkpoint onwards.
+
+        Each model keeps its own checkpoint (``<checkpoint>.<model>``), so a
+        --model run never moves another model past changes it skipped.
+        """
+        models = list(FEED_ENTITIES) if model == 'all' else [model]
+        checkpoints = {name: self.read_checkpoint(f'{checkpoint_path}.{name}') for name in models}
+        entities = {FEED_ENTITIES[name]: name for name in models}
+        after = min(checkpoints.values())
+        self.stdout.write(f'Syncing changes after #{after}...')
+        applied = 0
+
+        while True:
+            api_response = APIService.get_changes(after=after, jwt_token=jwt_token)
+            if 'error' in api_response:
+                self.stdout.write(self.style.ERROR(f'Error fetching changes: {api_response["error"]}'))
+                break
+
+            try:
+                for change in api_response.get('changes', []):
+                    name = entities.get(change['entity'])
+                    if name and change['seq'] > checkpoints[name]:
+                        self.apply_change(change)
+                        applied += 1
+            except Exception as e:
+                logger.error(f"Error applying changes after #{after}: {str(e)}")
+                self.stdout.write(self.style.ERROR(f'Error applying changes after #{after}: {str(e)}'))
+                break
+
+            after = api_response.get('last_seq', after)
+            for name in models:
+                if checkpoints[name] < after:
+                    checkpoints[name] = after
+                    self.write_checkpoint(f'{checkpoint_path}.{name}', after)
+            if not api_response.get('has_more'):
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Applied {applied} changes, checkpoint at #{after}'))
+
+    def apply_change(self, change):
+        data = change.get('data')
+        if change['operation'] == 'delete':
+            if change['entity'] == 'appointment':
+                Appointment.objects.filter(appointment_id=change['id']).delete()
+            elif data and data.get('email'):
+                model = Doctor if change['entity'] == 'doctor' else Patient
+                model.objects.filter(user__email=data['email']).delete()
+            self.stdout.write(f"Deleted {change['entity']}: {change['id']}")
+        elif data is None:
+            # Deleted again later in the feed; its tombstone follows.
+            return
+        elif change['entity'] == 'doctor':
+            self.sync_doctor(data)
+        elif change['entity'] == 'user':
+            self.sync_patient(data)
+        else:
+            self.sync_appointment(data)
+
+    def read_checkpoint(self, checkpoint_path):
+        try:
+            with open(checkpoint_path) as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, checkpoint_path, seq):
+        with open(checkpoint_path, 'w') as checkpoint:
+            checkpoint.write(str(seq))
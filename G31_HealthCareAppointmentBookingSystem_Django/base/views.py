@@ -46,6 +46,16 @@ def book_appointment(request, service_id, doctor_id):
         time_slots[value] = label
         start_time += slot_length
 
+    # Offer the doctor's free slots on the chosen day when the API has them
+    selected_date = request.POST.get('appointment_date') or request.GET.get('date') or datetime.now().date().isoformat()
+    availability = APIService.get_availability(selected_date, doctor_ids=[doctor_id],
+                                               jwt_token=request.session.get('jwt_token')).get('availability')
+    if availability:
+        time_slots = {}
+        for value in availability.get(str(doctor_id), {}).get(selected_date, []):
+            slot_start, slot_end = (datetime.strptime(part.strip(), "%H:%M") for part in value.split("-"))
+            time_slots[value] = f"{slot_start.strftime('%I:%M %p')} - {slot_end.strftime('%I:%M %p')}"
+
     try:
         service = base_models.Service.objects.get(id=service_id)
         doctor = doctor_models.Doctor.objects.get(id=doctor_id)
@@ -86,6 +96,7 @@ def book_appointment(request, service_id, doctor_id):
                         "doctor": doctor,
                         "patient": patient,
                         "time_slots": time_slots,
+                        "selected_date": selected_date,
                         "today": datetime.now().date(),
                         "post_data": request.POST,
                     }
@@ -159,6 +170,7 @@ def book_appointment(request, service_id, doctor_id):
                     "doctor": doctor,
                     "patient": patient,
                     "time_slots": time_slots,
+                    "selected_date": selected_date,
                     "today": datetime.now().date(),
                     "post_data": request.POST,
                 }
@@ -169,6 +181,7 @@ def book_appointment(request, service_id, doctor_id):
             "doctor": doctor,
             "patient": patient,
             "time_slots": time_slots,
+            "selected_date": selected_date,
             "today": datetime.now().date(),
         }
         return render(request, "base/book_appointment.html", context)
@@ -180,6 +193,7 @@ def book_appointment(request, service_id, doctor_id):
             "doctor": doctor if 'doctor' in locals() else None,
             "patient": patient if 'patient' in locals() else None,
             "time_slots": time_slots,
+            "selected_date": selected_date,
         }
         return render(request, "base/book_appointment.html", context)
 
@@ -384,7 +384,7 @@ def doctor_list(request):
     }
     
     # Get doctors from API
-    response = APIService.get_doctors(filters, token)
+    response = APIService.get_doctors(filters, token, all_pages=True)
     if response.get('success'):
         doctors = response['doctors']
     else:
@@ -468,7 +468,7 @@ def appointment_list(request):
         messages.error(request, "Authentication required")
         return redirect('userauths:sign-in')
     
-    response = APIService.get_appointments(jwt_token=token)
+    response = APIService.get_appointments(jwt_token=token, all_pages=True)
     if response.get('status') == 'success':
         appointments = response.get('appointments', [])
         return render(request, "doctor/appointment-list.html", {"appointments": appointments})
@@ -1,24 +1,43 @@
 import os
-import logging
-from datetime import timedelta, datetime
-from logging.handlers import RotatingFileHandler
+import hashlib
+from datetime import timedelta, datetime, date
 from functools import wraps
 from random import choice
 import time
+from collections import defaultdict
 
-from flask import Flask, jsonify, request, render_template, redirect, url_for, flash
+import click
+from flask import Flask, jsonify, request, render_template, redirect, url_for, flash, g, has_request_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_migrate import Migrate
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import make_transient_to_detached
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt
 from flask_restful import Api, Resource
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from flask_bcrypt import Bcrypt
 from werkzeug.utils import secure_filename
 
+from availability import SlotIndex, NextFreeSlots
+from cache import TTLCache
+from compression import Compression, compress_static
+from metrics import MetricsRegistry, CONTENT_TYPE
+from pagination import (encode_cursor, decode_cursor, parse_limit, parse_fields, parse_bool, parse_date,
+                        parse_datetime, escape_like)
+from passwords import PasswordHasher, PasswordHasherBusy, password_timed, password_rejected
+from querybudget import QueryBudget
+from requestlog import RequestLogging
+from schedule import (ScheduleCache, build_schedule, parse_slot_label, label_mask, interval_mask, slot_bounds,
+                      day_bounds, format_minutes, to_minutes, UNIT_MINUTES, WEEKDAYS)
+from search import SEARCH_TABLE, create_search_index, rebuild_search_index, drop_search_index, match_expression
+from serialization import FastJSONProvider, serializer, row_serializer_for
+from writer import WriteQueue, batch_committed
+
 basedir = os.path.abspath(os.path.dirname(__file__))
 app = Flask(__name__)
 
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(basedir, "doccure.db") + "?timeout=30"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get('DATABASE_URL', "sqlite:///" + os.path.join(basedir, "doccure.db"))
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'your-jwt-secret-key')
@@ -33,15 +52,170 @@ UPLOAD_FOLDER = 'static/uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+app.config['PASSWORD_POOL_WORKERS'] = int(os.environ.get('PASSWORD_POOL_WORKERS', 2))
+app.config['PASSWORD_POOL_MAX_PENDING'] = int(os.environ.get('PASSWORD_POOL_MAX_PENDING', 32))
+app.config['PRINCIPAL_CACHE_SIZE'] = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 4096))
+app.config['PRINCIPAL_CACHE_TTL'] = int(os.environ.get('PRINCIPAL_CACHE_TTL', 300))
+app.config['DOCTOR_CACHE_SIZE'] = int(os.environ.get('DOCTOR_CACHE_SIZE', 1024))
+app.config['DOCTOR_CACHE_TTL'] = int(os.environ.get('DOCTOR_CACHE_TTL', 60))
+app.config['ADMIN_PAGE_SIZE'] = int(os.environ.get('ADMIN_PAGE_SIZE', 25))
+app.config['TABLE_COUNT_CACHE_TTL'] = int(os.environ.get('TABLE_COUNT_CACHE_TTL', 30))
+app.config['SLOT_INDEX_SIZE'] = int(os.environ.get('SLOT_INDEX_SIZE', 100000))
+app.config['SCHEDULE_CACHE_SIZE'] = int(os.environ.get('SCHEDULE_CACHE_SIZE', 100000))
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 30000))
+app.config['SQLITE_WRITE_QUEUE'] = os.environ.get('SQLITE_WRITE_QUEUE', 'true').lower() == 'true'
+app.config['JSON_BACKEND'] = os.environ.get('JSON_BACKEND', 'orjson')
+app.config['LOG_MAX_BYTES'] = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+app.config['LOG_BACKUP_COUNT'] = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+app.config['COMPRESS_ENABLED'] = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.json = FastJSONProvider(app)
 
 db = SQLAlchemy(app)
+
+EXPRESSION_INDEXES = {'ix_doctors_full_name_nocase', 'ix_doctors_rating_id', 'ix_doctors_experience_id',
+                      'ix_doctors_specialization_rating_id', 'ix_doctors_specialization_experience_id',
+                      'ix_doctors_city_rating_id', 'ix_doctors_city_experience_id'}
+
+def include_in_migrations(obj, name, type_, reflected, compare_to):
+    # SQLite cannot reflect expression indexes, so autogenerate would re-emit them on every run.
+    # The FTS5 search table and its shadow tables are managed by search.py, not by the models.
+    if type_ == 'table' and name.startswith(SEARCH_TABLE):
+        return False
+    return not (type_ == 'index' and name in EXPRESSION_INDEXES)
+
+migrate = Migrate(app, db, include_object=include_in_migrations)
+metrics = MetricsRegistry()
+write_queue = WriteQueue(app, db)
+query_budget = QueryBudget(app, db)
+compression = Compression(app)
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}",
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+)
+
+with app.app_context():
+    @db.event.listens_for(db.engine, 'connect')
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself so savepoints work with pysqlite.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @db.event.listens_for(db.engine, 'begin')
+    def _begin_sqlite(connection):
+        mode = 'immediate' if write_queue.in_writer() else 'deferred'
+        started = time.perf_counter()
+        connection.exec_driver_sql('BEGIN IMMEDIATE' if mode == 'immediate' else 'BEGIN')
+        sqlite_begin_seconds.observe(time.perf_counter() - started, mode=mode)
 jwt = JWTManager(app)
-bcrypt = Bcrypt(app)
+password_hasher = PasswordHasher(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
 api = Api(app)
 
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    response = app.response_class(app.json.dumps(data), status=code, mimetype='application/json')
+    response.headers.extend(headers or {})
+    return response
+principal_cache = TTLCache(app.config['PRINCIPAL_CACHE_SIZE'], app.config['PRINCIPAL_CACHE_TTL'])
+doctor_response_cache = TTLCache(app.config['DOCTOR_CACHE_SIZE'], app.config['DOCTOR_CACHE_TTL'])
+table_count_cache = TTLCache(512, app.config['TABLE_COUNT_CACHE_TTL'])
+
+http_request_seconds = metrics.histogram('http_request_duration_seconds', 'Request latency by route.',
+                                         ('method', 'route', 'status'))
+http_requests_in_flight = metrics.gauge('http_requests_in_flight', 'Requests currently being handled.')
+db_queries_per_request = metrics.histogram('db_queries_per_request', 'SQL statements run per request.', ('route',),
+                                           buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+db_seconds_per_request = metrics.histogram('db_query_seconds_per_request', 'Time spent in SQL per request.',
+                                           ('route',))
+sqlite_begin_seconds = metrics.histogram('sqlite_begin_seconds', 'Time to open a transaction, including lock waits.',
+                                         ('mode',))
+sqlite_lock_errors = metrics.counter('sqlite_lock_errors_total', 'Statements that failed with "database is locked".')
+write_queue_wait_seconds = metrics.histogram('db_write_queue_wait_seconds', 'Time write jobs spent queued.')
+write_batch_size = metrics.histogram('db_write_batch_size', 'Write jobs committed per batch.',
+                                     buckets=(1, 2, 5, 10, 20, 50, 100))
+write_commit_seconds = metrics.histogram('db_write_commit_seconds', 'Time to run and commit a write batch.')
+password_hash_seconds = metrics.histogram('password_hash_seconds', 'bcrypt time per operation.', ('operation',))
+password_hasher_busy = metrics.counter('password_hasher_busy_total', 'Password operations rejected as busy.')
+
+def _request_route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    g.db_seconds = 0.0
+    http_requests_in_flight.inc()
+
+@app.before_request
+def _capture_principal_generation():
+    g.principal_generation = principal_cache.generation
+
+@app.after_request
+def _observe_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = _request_route()
+        http_request_seconds.observe(time.perf_counter() - started, method=request.method, route=route,
+                                     status=response.status_code)
+        db_queries_per_request.observe(g.get('query_count', 0), route=route)
+        db_seconds_per_request.observe(g.get('db_seconds', 0.0), route=route)
+    return response
+
+@app.teardown_request
+def _finish_request(error=None):
+    if g.pop('request_started', None) is not None:
+        http_requests_in_flight.dec()
+
+with app.app_context():
+    @db.event.listens_for(db.engine, 'before_cursor_execute')
+    def _start_query_timer(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @db.event.listens_for(db.engine, 'after_cursor_execute')
+    def _stop_query_timer(connection, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - connection.info['query_started'].pop()
+        if has_request_context():
+            g.db_seconds = g.get('db_seconds', 0.0) + elapsed
+
+    @db.event.listens_for(db.engine, 'handle_error')
+    def _count_lock_errors(context):
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            started.pop()
+        if 'database is locked' in str(context.original_exception):
+            sqlite_lock_errors.inc()
+
+@batch_committed.connect_via(write_queue)
+def _observe_write_batch(sender, size, waits, seconds):
+    write_batch_size.observe(size)
+    write_commit_seconds.observe(seconds)
+    for wait in waits:
+        write_queue_wait_seconds.observe(wait)
+
+@password_timed.connect_via(password_hasher)
+def _observe_password_hash(sender, operation, seconds):
+    password_hash_seconds.observe(seconds, operation=operation)
+
+@password_rejected.connect_via(password_hasher)
+def _count_password_rejections(sender):
+    password_hasher_busy.inc()
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return app.response_class(metrics.render(), mimetype=None, content_type=CONTENT_TYPE)
+
 CORS(app, 
      supports_credentials=True, 
      resources={r"/api/*": {
@@ -53,7 +227,21 @@ CORS(app,
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-class Admin(db.Model, UserMixin):
+DOCTOR_FIELDS = ('id', 'user_id', 'full_name', 'email', 'specialization', 'experience', 'city', 'fees',
+                 'profile_image', 'role', 'is_available', 'rating', 'total_ratings', 'created_at')
+
+APPOINTMENT_FIELDS = ('id', 'service_id', 'doctor_id', 'patient_id', 'appointment_date', 'time_slot', 'starts_at',
+                      'ends_at', 'illness', 'status', 'first_name', 'last_name', 'contact', 'age', 'gender', 'created_at', 'updated_at',
+                      'notes', 'prescription', 'follow_up_date')
+
+class PrincipalMixin(UserMixin):
+    principal_type = None
+
+    def get_id(self):
+        return f'{self.principal_type}:{self.id}'
+
+class Admin(db.Model, PrincipalMixin):
+    principal_type = 'admin'
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(80), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -64,95 +252,76 @@ class Admin(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password)
+        self.password_hash = password_hasher.generate_password_hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check_password_hash(self.password_hash, password)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'full_name': self.full_name,
-            'email': self.email,
-            'is_admin': self.is_admin,
-            'is_super_admin': self.is_super_admin,
-            'role': self.role,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    to_dict = serializer('id', 'full_name', 'email', 'is_admin', 'is_super_admin', 'role', 'created_at')
 
-class User(db.Model, UserMixin):
+class User(db.Model, PrincipalMixin):
     __tablename__ = "users"
+    principal_type = 'user'
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(50), nullable=True, unique=True)
     password_hash = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(50), nullable=False, default="user")
-    appointments = db.relationship('Appointment', backref='patient', lazy=True)
+    appointments = db.relationship('Appointment', back_populates='patient', lazy=True)
     profile_image = db.Column(db.String(200))
     phone = db.Column(db.String(20))
     address = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password)
+        self.password_hash = password_hasher.generate_password_hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check_password_hash(self.password_hash, password)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'full_name': self.full_name,
-            'email': self.email,
-            'role': self.role,
-            'profile_image': self.profile_image,
-            'phone': self.phone,
-            'address': self.address,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    to_dict = serializer('id', 'full_name', 'email', 'role', 'profile_image', 'phone', 'address', 'created_at')
 
-class Doctor(db.Model, UserMixin):
+class Doctor(db.Model, PrincipalMixin):
     __tablename__ = "doctors"
+    principal_type = 'doctor'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     full_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(50), nullable=True, unique=True)
     password_hash = db.Column(db.String(100), nullable=False)
-    specialization = db.Column(db.String(100), nullable=False)
+    specialization = db.Column(db.String(100), nullable=False, index=True)
     experience = db.Column(db.Integer)
-    city = db.Column(db.String(50))
+    city = db.Column(db.String(50), index=True)
     fees = db.Column(db.Float, nullable=False)
     profile_image = db.Column(db.String(200))
     role = db.Column(db.String(50), nullable=False, default="doctor")
-    appointments = db.relationship('Appointment', backref='doctor', lazy=True)
+    appointments = db.relationship('Appointment', back_populates='doctor', lazy=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_available = db.Column(db.Boolean, default=True)
     rating = db.Column(db.Float, default=0.0)
     total_ratings = db.Column(db.Integer, default=0)
+    __table_args__ = (
+        db.Index('ix_doctors_full_name_nocase', db.text('full_name COLLATE NOCASE')),
+        # Match the ORDER BY of DoctorsListResource.SORTS, alone and after each equality filter.
+        db.Index('ix_doctors_rating_id', db.text('coalesce(rating, 0.0)'), 'id'),
+        db.Index('ix_doctors_experience_id', db.text('coalesce(experience, 0)'), 'id'),
+        db.Index('ix_doctors_specialization_rating_id', 'specialization', db.text('coalesce(rating, 0.0)'), 'id'),
+        db.Index('ix_doctors_specialization_experience_id', 'specialization', db.text('coalesce(experience, 0)'), 'id'),
+        db.Index('ix_doctors_city_rating_id', 'city', db.text('coalesce(rating, 0.0)'), 'id'),
+        db.Index('ix_doctors_city_experience_id', 'city', db.text('coalesce(experience, 0)'), 'id'),
+    )
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password)
+        self.password_hash = password_hasher.generate_password_hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check_password_hash(self.password_hash, password)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'full_name': self.full_name,
-            'email': self.email,
-            'specialization': self.specialization,
-            'experience': self.experience,
-            'city': self.city,
-            'fees': self.fees,
-            'profile_image': self.profile_image,
-            'role': self.role,
-            'is_available': self.is_available,
-            'rating': self.rating,
-            'total_ratings': self.total_ratings,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    to_dict = serializer(*DOCTOR_FIELDS)
+
+db.event.listen(Doctor.__table__, 'after_create', lambda target, connection, **kw: create_search_index(connection))
+db.event.listen(Doctor.__table__, 'before_drop', lambda target, connection, **kw: drop_search_index(connection))
+doctor_search = db.table(SEARCH_TABLE, db.column('rowid'), db.column('rank'))
 
 class Appointment(db.Model):
     __tablename__ = "appointments"
@@ -162,40 +331,617 @@ class Appointment(db.Model):
     patient_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     appointment_date = db.Column(db.Date, nullable=False)
     time_slot = db.Column(db.String(20), nullable=False)
+    starts_at = db.Column(db.DateTime, nullable=False, index=True)
+    ends_at = db.Column(db.DateTime, nullable=False)
     illness = db.Column(db.String(100), nullable=False)
-    status = db.Column(db.String(20), default='Confirmed')
+    status = db.Column(db.String(20), default='Confirmed', index=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     contact = db.Column(db.String(20), nullable=False)
     age = db.Column(db.Integer, nullable=False)
     gender = db.Column(db.String(10), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     notes = db.Column(db.Text)
     prescription = db.Column(db.Text)
     follow_up_date = db.Column(db.Date)
+    doctor = db.relationship('Doctor', back_populates='appointments', lazy='select')
+    patient = db.relationship('User', back_populates='appointments', lazy='select')
+    __table_args__ = (
+        db.Index('ix_appointments_doctor_id_starts_at', 'doctor_id', 'starts_at'),
+        db.Index('ix_appointments_patient_id_starts_at', 'patient_id', 'starts_at'),
+        db.Index('uq_appointments_active_slot', 'doctor_id', 'appointment_date', 'time_slot',
+                 unique=True, sqlite_where=db.text("status != 'Cancelled'")),
+    )
+
+    to_dict = serializer(*APPOINTMENT_FIELDS)
+
+def select_fields(query, model, fields, extra=()):
+    selected = [*fields, *[field for field in extra if field not in fields]]
+    return query.with_entities(*[getattr(model, field) for field in selected])
+
+class Identity(db.Model):
+    __tablename__ = "identities"
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    principal_type = db.Column(db.String(20), nullable=False)
+    principal_id = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.UniqueConstraint('principal_type', 'principal_id'),)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'service_id': self.service_id,
-            'doctor_id': self.doctor_id,
-            'patient_id': self.patient_id,
-            'appointment_date': self.appointment_date.strftime('%Y-%m-%d'),
-            'time_slot': self.time_slot,
-            'illness': self.illness,
-            'status': self.status,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'contact': self.contact,
-            'age': self.age,
-            'gender': self.gender,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'notes': self.notes,
-            'prescription': self.prescription,
-            'follow_up_date': self.follow_up_date.strftime('%Y-%m-%d') if self.follow_up_date else None
-        }
+class WorkingHours(db.Model):
+    __tablename__ = "working_hours"
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False, index=True)
+    weekday = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    slot_minutes = db.Column(db.Integer, nullable=False, default=60)
+
+class ScheduleException(db.Model):
+    __tablename__ = "schedule_exceptions"
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time)
+    end_time = db.Column(db.Time)
+    slot_minutes = db.Column(db.Integer)
+    __table_args__ = (
+        db.Index('ix_schedule_exceptions_doctor_id_date', 'doctor_id', 'date'),
+    )
+
+class Counter(db.Model):
+    __tablename__ = "counters"
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeLog(db.Model):
+    __tablename__ = "change_log"
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    data = db.Column(db.Text)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+PRINCIPAL_MODELS = {'admin': Admin, 'doctor': Doctor, 'user': User}
+CHANGE_FEED_MODELS = {'user': User, 'doctor': Doctor, 'appointment': Appointment}
+
+def email_exists(email):
+    return db.session.query(Identity.id).filter_by(email=email).first() is not None
+
+def principal_by_email_query(email):
+    """The identity for ``email`` outer-joined to every principal table, so
+    the one row that matches comes back in a single statement."""
+    query = db.session.query(*PRINCIPAL_MODELS.values()).select_from(Identity)
+    for principal_type, model in PRINCIPAL_MODELS.items():
+        query = query.outerjoin(model, db.and_(Identity.principal_type == principal_type,
+                                               model.id == Identity.principal_id))
+    return query.filter(Identity.email == email)
+
+def find_principal_by_email(email):
+    row = principal_by_email_query(email).first()
+    if not row:
+        return None
+    return next((principal for principal in row if principal is not None), None)
+
+def authenticate(email, password):
+    user = find_principal_by_email(email)
+    if not user or not user.check_password(password):
+        return None
+    if password_hasher.needs_rehash(user.password_hash):
+        try:
+            password_hash = password_hasher.generate_password_hash(password)
+            write_queue.run(lambda: _store_password_hash(type(user), user.id, password_hash))
+        except Exception as e:
+            app.logger.warning(f'Password rehash failed: {str(e)}')
+    return user
+
+def _store_password_hash(model, principal_id, password_hash):
+    db.session.get(model, principal_id).password_hash = password_hash
+
+def _insert_identity(connection, principal_type, target):
+    if target.email:
+        connection.execute(Identity.__table__.insert().values(
+            email=target.email,
+            principal_type=principal_type,
+            principal_id=target.id
+        ))
+
+def _delete_identity(connection, principal_type, target):
+    connection.execute(Identity.__table__.delete().where(
+        Identity.principal_type == principal_type,
+        Identity.principal_id == target.id
+    ))
+
+def _register_identity_sync(principal_type, model):
+    @db.event.listens_for(model, 'after_insert')
+    def after_insert(mapper, connection, target):
+        _insert_identity(connection, principal_type, target)
+
+    @db.event.listens_for(model, 'after_update')
+    def after_update(mapper, connection, target):
+        if db.inspect(target).attrs.email.history.has_changes():
+            _delete_identity(connection, principal_type, target)
+            _insert_identity(connection, principal_type, target)
+
+    @db.event.listens_for(model, 'after_delete')
+    def after_delete(mapper, connection, target):
+        _delete_identity(connection, principal_type, target)
+
+for _principal_type, _model in PRINCIPAL_MODELS.items():
+    _register_identity_sync(_principal_type, _model)
+
+PRINCIPAL_TYPES = {model: principal_type for principal_type, model in PRINCIPAL_MODELS.items()}
+
+@db.event.listens_for(db.session, 'after_flush')
+def _track_principal_writes(session, flush_context):
+    # Dropped only once the change is committed; dropping at flush time
+    # would let a concurrent request cache the old row again.
+    for obj in (*session.dirty, *session.deleted):
+        principal_type = PRINCIPAL_TYPES.get(type(obj))
+        if principal_type is not None:
+            session.info.setdefault('principal_changes', set()).add((principal_type, obj.id))
+
+@db.event.listens_for(db.session, 'after_commit')
+def _invalidate_principals(session):
+    for key in session.info.pop('principal_changes', ()):
+        principal_cache.invalidate(key)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def _discard_principal_writes(session):
+    session.info.pop('principal_changes', None)
+
+def _log_change(connection, entity, target, operation, data=None):
+    connection.execute(ChangeLog.__table__.insert().values(
+        entity=entity,
+        entity_id=target.id,
+        operation=operation,
+        changed_at=datetime.utcnow(),
+        data=data
+    ))
+
+def _register_change_log(entity, model):
+    @db.event.listens_for(model, 'after_insert')
+    def after_insert(mapper, connection, target):
+        _log_change(connection, entity, target, 'insert')
+
+    @db.event.listens_for(model, 'after_update')
+    def after_update(mapper, connection, target):
+        if db.object_session(target).is_modified(target, include_collections=False):
+            _log_change(connection, entity, target, 'update')
+
+    @db.event.listens_for(model, 'after_delete')
+    def after_delete(mapper, connection, target):
+        # Only already-loaded values: the row is gone, so nothing can be fetched.
+        # Dates are rendered the way the model serializers render them, not by the JSON backend.
+        loaded = db.inspect(target).dict
+        _log_change(connection, entity, target, 'delete', app.json.dumps({
+            field: value.isoformat() if isinstance(value, date) else value
+            for field in model.to_dict.fields if field in loaded
+            for value in (loaded[field],)
+        }))
+
+for _entity, _model in CHANGE_FEED_MODELS.items():
+    _register_change_log(_entity, _model)
+
+COUNTED_MODELS = {Doctor: ('doctors', None), User: ('users', 'role'), Appointment: ('appointments', 'status')}
+
+def _counted_value(obj, column):
+    value = getattr(obj, column)
+    default = type(obj).__table__.c[column].default
+    if value is None and default is not None and default.is_scalar:
+        return default.arg
+    return value
+
+def _add_counts(deltas, obj, sign):
+    prefix, column = COUNTED_MODELS[type(obj)]
+    deltas[prefix] += sign
+    if column:
+        deltas[f'{prefix}:{_counted_value(obj, column)}'] += sign
+
+@db.event.listens_for(db.session, 'before_flush')
+def _count_writes(session, flush_context, instances):
+    deltas = defaultdict(int)
+    for obj in session.new:
+        if type(obj) in COUNTED_MODELS:
+            _add_counts(deltas, obj, 1)
+    for obj in session.deleted:
+        if type(obj) in COUNTED_MODELS:
+            _add_counts(deltas, obj, -1)
+    for obj in session.dirty:
+        column = COUNTED_MODELS.get(type(obj), (None, None))[1]
+        if column:
+            history = db.inspect(obj).attrs[column].history
+            if history.has_changes():
+                prefix = COUNTED_MODELS[type(obj)][0]
+                for value in history.deleted:
+                    deltas[f'{prefix}:{value}'] -= 1
+                for value in history.added:
+                    deltas[f'{prefix}:{value}'] += 1
+    session.info['counter_deltas'] = [{'name': name, 'value': delta} for name, delta in deltas.items() if delta]
+
+@db.event.listens_for(db.session, 'after_flush')
+def _write_counts(session, flush_context):
+    # Written on the flush's own connection so the counts commit or roll back with the rows.
+    changes = session.info.pop('counter_deltas', None)
+    if changes:
+        statement = sqlite_insert(Counter.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['name'], set_={'value': Counter.__table__.c.value + statement.excluded.value})
+        session.connection().execute(statement, changes)
+
+def rebuild_counters():
+    counts = {'doctors': db.session.query(Doctor).count()}
+    for model, (prefix, column) in COUNTED_MODELS.items():
+        if column:
+            key = getattr(model, column)
+            default = model.__table__.c[column].default
+            if default is not None and default.is_scalar:
+                key = db.func.coalesce(key, default.arg)
+            for value, count in db.session.query(key, db.func.count()).group_by(key):
+                counts[prefix] = counts.get(prefix, 0) + count
+                counts[f'{prefix}:{value}'] = count
+    db.session.query(Counter).delete()
+    db.session.add_all([Counter(name=name, value=value) for name, value in counts.items()])
+    db.session.commit()
+    return counts
+
+def read_counters():
+    return dict(db.session.query(Counter.name, Counter.value))
+
+@db.event.listens_for(db.session, 'after_flush')
+def _track_doctor_writes(session, flush_context):
+    if any(isinstance(obj, Doctor) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['doctors_changed'] = True
+
+@db.event.listens_for(db.session, 'after_commit')
+def _invalidate_doctor_responses(session):
+    if session.info.pop('doctors_changed', False):
+        doctor_response_cache.clear()
+
+@db.event.listens_for(Appointment, 'before_insert')
+@db.event.listens_for(Appointment, 'before_update')
+def _set_slot_bounds(mapper, connection, target):
+    target.starts_at, target.ends_at = slot_bounds(target.appointment_date, target.time_slot)
+
+def starts_between(first, last=None):
+    lower, upper = day_bounds(first, last)
+    return db.and_(Appointment.starts_at >= lower, Appointment.starts_at < upper)
+
+def _load_booked_slots(doctor_id, day, exclude=None):
+    query = db.session.query(Appointment.starts_at, Appointment.ends_at) \
+        .filter(Appointment.doctor_id == doctor_id, starts_between(day), Appointment.status != 'Cancelled')
+    if exclude is not None:
+        query = query.filter(Appointment.id != exclude)
+    return query.all()
+
+def _load_booked_slot_range(doctor_ids, start, end):
+    return db.session.query(Appointment.doctor_id, Appointment.starts_at, Appointment.ends_at) \
+        .filter(Appointment.doctor_id.in_(doctor_ids), starts_between(start, end),
+                Appointment.status != 'Cancelled').all()
+
+def _load_schedules(doctor_ids):
+    hours = defaultdict(list)
+    exceptions = defaultdict(list)
+    for row in WorkingHours.query.filter(WorkingHours.doctor_id.in_(doctor_ids)):
+        hours[row.doctor_id].append(row)
+    for row in ScheduleException.query.filter(ScheduleException.doctor_id.in_(doctor_ids)):
+        exceptions[row.doctor_id].append(row)
+    return {doctor_id: build_schedule(hours[doctor_id], exceptions[doctor_id]) for doctor_id in {*hours, *exceptions}}
+
+slot_index = SlotIndex(_load_booked_slots, _load_booked_slot_range, app.config['SLOT_INDEX_SIZE'])
+schedule_cache = ScheduleCache(_load_schedules, app.config['SCHEDULE_CACHE_SIZE'])
+next_free_slots = NextFreeSlots(slot_index, schedule_cache, app.config['SLOT_INDEX_SIZE'])
+
+def _history_values(obj, attr):
+    history = db.inspect(obj).attrs[attr].history
+    return [value for value in (*history.deleted, *history.unchanged, *history.added) if value is not None]
+
+@db.event.listens_for(db.session, 'after_flush')
+def _track_slot_writes(session, flush_context):
+    changes = session.info.setdefault('slot_changes', [])
+    for obj in session.new:
+        if isinstance(obj, Appointment) and obj.status != 'Cancelled':
+            changes.append(('book', obj.doctor_id, obj.appointment_date, obj.starts_at, obj.ends_at))
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            changes.append(('invalidate', obj.doctor_id, obj.appointment_date))
+    for obj in session.dirty:
+        if isinstance(obj, Appointment) and any(
+                db.inspect(obj).attrs[attr].history.has_changes()
+                for attr in ('doctor_id', 'appointment_date', 'time_slot', 'status')):
+            for doctor_id in _history_values(obj, 'doctor_id'):
+                for day in _history_values(obj, 'appointment_date'):
+                    changes.append(('invalidate', doctor_id, day))
+
+@db.event.listens_for(db.session, 'after_commit')
+def _apply_slot_writes(session):
+    for change in session.info.pop('slot_changes', []):
+        if change[0] == 'book':
+            slot_index.book(change[1], *change[3:])
+        else:
+            slot_index.invalidate(*change[1:])
+        next_free_slots.changed(*change[1:3])
+
+@db.event.listens_for(db.session, 'after_soft_rollback')
+def _demote_slot_writes(session, previous_transaction):
+    # A rolled back insert may share a transaction with committed ones, so
+    # anything it touched is reloaded rather than marked booked.
+    changes = session.info.get('slot_changes')
+    if changes:
+        session.info['slot_changes'] = [('invalidate', *change[1:3]) for change in changes]
+
+@db.event.listens_for(db.session, 'after_flush')
+def _track_schedule_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (WorkingHours, ScheduleException)):
+            session.info.setdefault('schedule_changes', set()).update(_history_values(obj, 'doctor_id'))
+
+@db.event.listens_for(db.session, 'after_commit')
+def _apply_schedule_writes(session):
+    for doctor_id in session.info.pop('schedule_changes', ()):
+        schedule_cache.invalidate(doctor_id)
+        next_free_slots.forget(doctor_id)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def _discard_schedule_writes(session):
+    session.info.pop('schedule_changes', None)
+
+class SlotUnavailable(Exception):
+    pass
+
+class SlotOutsideSchedule(Exception):
+    pass
+
+def check_slot(doctor_id, day, time_slot, exclude=None):
+    # ``exclude`` is the id of an appointment being moved, whose own
+    # interval must not count as taken.
+    start, end = parse_slot_label(time_slot)
+    if not schedule_cache.get(doctor_id).template_for(day).accepts(start, end):
+        raise SlotOutsideSchedule()
+    if exclude is None:
+        booked = slot_index.booked(doctor_id, day)
+    else:
+        booked = 0
+        for starts_at, ends_at in _load_booked_slots(doctor_id, day, exclude):
+            booked |= interval_mask(starts_at, ends_at)
+    if booked & label_mask(time_slot):
+        raise SlotUnavailable()
+
+def reserve_appointment(appointment):
+    check_slot(appointment.doctor_id, appointment.appointment_date, appointment.time_slot)
+    db.session.add(appointment)
+    try:
+        db.session.flush()
+    except IntegrityError as e:
+        if 'UNIQUE' in str(e):
+            raise SlotUnavailable()
+        raise
+    return appointment.to_dict()
+
+def reserve_appointments(appointments):
+    days = {(appointment.doctor_id, appointment.appointment_date) for appointment in appointments}
+    taken = defaultdict(int)
+    for row in db.session.query(Appointment.doctor_id, Appointment.starts_at, Appointment.ends_at) \
+            .filter(db.or_(*[db.and_(Appointment.doctor_id == doctor_id, starts_between(day)) for doctor_id, day in days]),
+                    Appointment.status != 'Cancelled'):
+        taken[(row.doctor_id, row.starts_at.date())] |= interval_mask(row.starts_at, row.ends_at)
+    reserved = []
+    for appointment in appointments:
+        key = (appointment.doctor_id, appointment.appointment_date)
+        mask = label_mask(appointment.time_slot)
+        if taken[key] & mask:
+            reserved.append(None)
+        else:
+            taken[key] |= mask
+            reserved.append(appointment)
+    db.session.add_all([appointment for appointment in reserved if appointment is not None])
+    try:
+        db.session.flush()
+    except IntegrityError as e:
+        if 'UNIQUE' in str(e):
+            raise SlotUnavailable()
+        raise
+    return [appointment.to_dict() if appointment is not None else None for appointment in reserved]
+
+def replace_schedule(doctor_id, hours=None, exceptions=None):
+    for model, rows in ((WorkingHours, hours), (ScheduleException, exceptions)):
+        if rows is None:
+            continue
+        for row in model.query.filter_by(doctor_id=doctor_id):
+            db.session.delete(row)
+        for row in rows:
+            row.doctor_id = doctor_id
+        db.session.add_all(rows)
+    db.session.flush()
+
+SLOT_FIELDS = ('doctor_id', 'appointment_date', 'time_slot', 'status')
+
+def apply_appointment_changes(appointment_id, changes):
+    appointment = db.session.get(Appointment, appointment_id)
+    slot = {field: changes.get(field, getattr(appointment, field)) for field in SLOT_FIELDS}
+    if slot['status'] != 'Cancelled' and any(slot[field] != getattr(appointment, field) for field in SLOT_FIELDS):
+        try:
+            doctor_id = int(slot['doctor_id'])
+        except (TypeError, ValueError):
+            raise ValueError('doctor_id must be an integer')
+        if not isinstance(slot['appointment_date'], date):
+            raise ValueError('Invalid date format, should be YYYY-MM-DD')
+        check_slot(doctor_id, slot['appointment_date'], slot['time_slot'], exclude=appointment.id)
+    for key, value in changes.items():
+        if hasattr(appointment, key):
+            setattr(appointment, key, value)
+    try:
+        db.session.flush()
+    except IntegrityError as e:
+        if 'UNIQUE' in str(e):
+            raise SlotUnavailable()
+        raise
+    return appointment.to_dict()
+
+def toggle_doctor_availability(doctor_id):
+    doctor = db.session.get(Doctor, doctor_id)
+    doctor.is_available = not doctor.is_available
+    return doctor.is_available
+
+def remove_appointment(appointment_id):
+    appointment = db.session.get(Appointment, appointment_id)
+    if appointment is not None:
+        db.session.delete(appointment)
+
+ADMIN_MAX_PAGE_SIZE = 100
+DASHBOARD_ROWS = 10
+
+def count_rows(query, counter=None):
+    if counter:
+        return read_counters().get(counter, 0)
+    key = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    total = table_count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        table_count_cache.set(key, total)
+    return total
+
+def paginate_table(query, sorts, default_sort, counter=None, options=()):
+    sort = request.args.get('sort', default_sort)
+    if sort.lstrip('-') not in sorts:
+        sort = default_sort
+    descending = sort.startswith('-')
+    columns = (sorts[sort.lstrip('-')], sorts['id'])
+    try:
+        per_page = parse_limit(request.args.get('per_page'), app.config['ADMIN_PAGE_SIZE'], ADMIN_MAX_PAGE_SIZE)
+    except ValueError:
+        per_page = app.config['ADMIN_PAGE_SIZE']
+    page = request.args.get('page', 1, type=int)
+    pagination = query.options(*options).order_by(*[column.desc() if descending else column for column in columns]) \
+        .paginate(page=max(page, 1), per_page=per_page, error_out=False, count=False)
+    pagination.total = count_rows(query, counter)
+    pagination.sort = sort
+    return pagination
+
+APPOINTMENT_TABLE_SORTS = {
+    'id': Appointment.id,
+    'appointment_date': Appointment.starts_at,
+    'created_at': Appointment.created_at,
+    'status': Appointment.status,
+}
+DOCTOR_TABLE_SORTS = {
+    'id': Doctor.id,
+    'full_name': Doctor.full_name,
+    'specialization': Doctor.specialization,
+    'city': Doctor.city,
+    'rating': Doctor.rating,
+}
+PATIENT_TABLE_SORTS = {
+    'id': User.id,
+    'full_name': User.full_name,
+    'email': User.email,
+    'created_at': User.created_at,
+}
+
+APPOINTMENT_PEOPLE = (db.joinedload(Appointment.doctor), db.joinedload(Appointment.patient))
+
+def filter_appointments(query, filters):
+    if 'status' in filters:
+        query = query.filter(Appointment.status == filters['status'])
+    try:
+        for name, column in (('doctor_id', Appointment.doctor_id), ('patient_id', Appointment.patient_id)):
+            if name in filters:
+                query = query.filter(column == int(filters[name]))
+        if 'from' in filters:
+            query = query.filter(Appointment.starts_at >= day_bounds(parse_date(filters['from'], 'from'))[0])
+        if 'to' in filters:
+            query = query.filter(Appointment.starts_at < day_bounds(parse_date(filters['to'], 'to'))[1])
+    except ValueError as e:
+        flash(str(e), "danger")
+    return query
+
+def table_filters(names):
+    return {name: request.args[name] for name in names if request.args.get(name)}
+
+def cached_json_response(cache, build):
+    key = (request.path, tuple(sorted(request.args.items(multi=True))))
+    entry = cache.get(key)
+    if entry is None:
+        payload, status = build()
+        if status != 200:
+            return payload, status
+        body = app.json.dumps(payload).encode('utf-8')
+        entry = (hashlib.sha1(body).hexdigest(), body)
+        cache.set(key, entry)
+    etag, body = entry
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+def load_principal(principal_type, principal_id):
+    model = PRINCIPAL_MODELS.get(principal_type)
+    try:
+        key = (principal_type, int(principal_id))
+    except (TypeError, ValueError):
+        return None
+    if model is None:
+        return None
+    values = principal_cache.get(key)
+    if values is None:
+        # The generation from before the request's first query, so a row
+        # read from a snapshot older than an invalidation is never cached.
+        generation = g.get('principal_generation', principal_cache.generation)
+        principal = db.session.get(model, key[1])
+        if principal is not None:
+            principal_cache.set(key, {
+                attr.key: getattr(principal, attr.key)
+                for attr in db.inspect(model).column_attrs if attr.key != 'password_hash'
+            }, generation)
+        return principal
+    principal = model(**values)
+    make_transient_to_detached(principal)
+    return db.session.merge(principal, load=False)
+
+def current_principal():
+    if 'principal' not in g:
+        principal_id = get_jwt_identity()
+        principal_type = get_jwt().get('principal_type')
+        if principal_type:
+            g.principal = load_principal(principal_type, principal_id)
+        else:
+            g.principal = load_principal('user', principal_id) or \
+                load_principal('doctor', principal_id) or \
+                load_principal('admin', principal_id)
+    return g.principal
+
+def create_principal_token(principal_type, principal_id):
+    return create_access_token(
+        identity=str(principal_id),
+        additional_claims={'principal_type': principal_type}
+    )
+
+def create_principal(model, **values):
+    principal = model(**values)
+    db.session.add(principal)
+    db.session.flush()
+    return principal.to_dict()
+
+def sync_identity_directory():
+    try:
+        known = {(row.principal_type, row.principal_id) for row in
+                 db.session.query(Identity.principal_type, Identity.principal_id)}
+        taken = {row.email for row in db.session.query(Identity.email)}
+        added = 0
+        for principal_type, model in PRINCIPAL_MODELS.items():
+            for principal_id, email in db.session.query(model.id, model.email).filter(model.email.isnot(None)):
+                if (principal_type, principal_id) in known or email in taken:
+                    continue
+                db.session.add(Identity(email=email, principal_type=principal_type, principal_id=principal_id))
+                taken.add(email)
+                added += 1
+        db.session.commit()
+        if added:
+            app.logger.info(f'Identity directory backfilled with {added} entries')
+    except Exception as e:
+        app.logger.error(f'Error syncing identity directory: {str(e)}')
+        db.session.rollback()
 
 class LoginResource(Resource):
     def post(self):
@@ -212,16 +958,10 @@ class LoginResource(Resource):
             email = data.get('email')
             password = data.get('password')
             
-            user = Admin.query.filter_by(email=email).first()
-            
-            if not user:
-                user = Doctor.query.filter_by(email=email).first()
-            
-            if not user:
-                user = User.query.filter_by(email=email).first()
+            user = authenticate(email, password)
 
-            if user and user.check_password(password):
-                access_token = create_access_token(identity=str(user.id))
+            if user:
+                access_token = create_principal_token(user.principal_type, user.id)
                 return {
                     'status': 'success',
                     'access_token': access_token,
@@ -231,6 +971,9 @@ class LoginResource(Resource):
             
             return {'status': 'error', 'message': 'Invalid credentials'}, 401
 
+        except PasswordHasherBusy:
+            app.logger.warning('Login rejected: password hashing queue is full')
+            return {'status': 'error', 'message': 'Server busy, please retry'}, 503, {'Retry-After': '1'}
         except Exception as e:
             app.logger.error(f'Login error: {str(e)}')
             return {'status': 'error', 'message': 'Error processing login request'}, 500
@@ -252,73 +995,301 @@ class RegisterResource(Resource):
             full_name = data.get('full_name')
             role = data.get('role', 'patient').lower()
 
-            if User.query.filter_by(email=email).first() or \
-               Doctor.query.filter_by(email=email).first() or \
-               Admin.query.filter_by(email=email).first():
+            if email_exists(email):
                 return {'status': 'error', 'message': 'Email already exists'}, 400
 
-            user = User(
+            password_hash = password_hasher.generate_password_hash(password)
+            user = write_queue.run(lambda: create_principal(
+                User,
                 full_name=full_name,
                 email=email,
-                role=role
-            )
-            user.set_password(password)
-            db.session.add(user)
-            db.session.commit()
+                role=role,
+                password_hash=password_hash
+            ))
             
-            access_token = create_access_token(identity=str(user.id))
+            access_token = create_principal_token(User.principal_type, user['id'])
             
             return {
                 'status': 'success',
                 'message': 'Registration successful',
                 'access_token': access_token,
-                'user': user.to_dict()
+                'user': user
             }, 201
 
+        except PasswordHasherBusy:
+            app.logger.warning('Registration rejected: password hashing queue is full')
+            return {'status': 'error', 'message': 'Server busy, please retry'}, 503, {'Retry-After': '1'}
+        except IntegrityError:
+            return {'status': 'error', 'message': 'Email already exists'}, 400
         except Exception as e:
             db.session.rollback()
             app.logger.error(f'Error creating user: {str(e)}')
             return {'status': 'error', 'message': 'Error creating user'}, 500
 
+def keyset_after(sort_column, id_column, after, descending):
+    # Spelled out rather than as a row value: SQLite only bounds an index
+    # range on an expression column through a plain comparison.
+    value, last_id = after
+    if descending:
+        return db.and_(sort_column <= value, db.or_(sort_column < value, id_column < last_id))
+    return db.and_(sort_column >= value, db.or_(sort_column > value, id_column > last_id))
+
 class DoctorsListResource(Resource):
+    SORTS = {
+        'id': Doctor.id,
+        # Literal defaults, not bound parameters, so SQLite matches the expression indexes.
+        'rating': db.func.coalesce(Doctor.rating, db.literal_column('0.0')),
+        'experience': db.func.coalesce(Doctor.experience, db.literal_column('0')),
+        'relevance': doctor_search.c.rank,
+    }
+
+    @query_budget.limit(1)
     def get(self):
-        specialization = request.args.get('specialization')
+        return cached_json_response(doctor_response_cache, self.build)
+
+    def build(self):
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            fields = parse_fields(request.args.get('fields'), DOCTOR_FIELDS)
+            available = parse_bool(request.args.get('available'))
+            search = request.args.get('q')
+            match = match_expression(search) if search is not None else None
+            sort = request.args.get('sort', 'relevance' if match else 'id')
+            descending = sort.startswith('-')
+            sort_key = sort.lstrip('-')
+            if sort_key not in self.SORTS:
+                raise ValueError(f'Invalid sort field: {sort_key}')
+            if sort_key == 'relevance' and not match:
+                raise ValueError('sort=relevance requires q')
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor, 2) if cursor else None
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
+        specialization = request.args.get('specialization') or request.args.get('specialty')
         city = request.args.get('city')
+        name = request.args.get('name')
+        sort_column = self.SORTS[sort_key]
         
         query = Doctor.query
         
+        if match:
+            query = query.join(doctor_search, doctor_search.c.rowid == Doctor.id) \
+                .filter(db.literal_column(SEARCH_TABLE).op('MATCH')(match))
         if specialization:
             query = query.filter(Doctor.specialization == specialization)
         if city:
             query = query.filter(Doctor.city == city)
+        if name:
+            query = query.filter(Doctor.full_name.like(escape_like(name) + '%', escape='\\'))
+        if available is not None:
+            query = query.filter(Doctor.is_available == available)
+        if after:
+            query = query.filter(keyset_after(sort_column, Doctor.id, after, descending))
+        if descending:
+            query = query.order_by(sort_column.desc(), Doctor.id.desc())
+        else:
+            query = query.order_by(sort_column, Doctor.id)
+        fields = tuple(fields or DOCTOR_FIELDS)
+        query = select_fields(query, Doctor, fields, extra=('id',)).add_columns(sort_column.label('sort_value'))
             
-        doctors = query.all()
-        return {'status': 'success', 'doctors': [doctor.to_dict() for doctor in doctors]}, 200
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor([last['sort_value'], last['id']])
+        serialize = row_serializer_for(Doctor, fields)
+        return {
+            'status': 'success',
+            'doctors': [serialize(row) for row in rows],
+            'next_cursor': next_cursor
+        }, 200
 
 class DoctorResource(Resource):
+    @query_budget.limit(1)
     def get(self, doctor_id):
+        return cached_json_response(doctor_response_cache, lambda: self.build(doctor_id))
+
+    def build(self, doctor_id):
         doctor = Doctor.query.get_or_404(doctor_id)
         return {'status': 'success', 'doctor': doctor.to_dict()}, 200
 
+class AvailabilityResource(Resource):
+    MAX_DAYS = 31
+    MAX_DOCTORS = 50
+
+    @query_budget.limit(4)
+    def get(self):
+        try:
+            start = datetime.strptime(request.args['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.args.get('end') or request.args['start'], '%Y-%m-%d').date()
+        except KeyError:
+            return {'status': 'error', 'message': 'start parameter is required'}, 400
+        except ValueError:
+            return {'status': 'error', 'message': 'Invalid date format, should be YYYY-MM-DD'}, 400
+        if end < start or (end - start).days >= self.MAX_DAYS:
+            return {'status': 'error', 'message': f'Date range must span 1 to {self.MAX_DAYS} days'}, 400
+
+        specialization = request.args.get('specialization')
+        if request.args.get('doctor_ids'):
+            try:
+                doctor_ids = sorted({int(value) for value in request.args['doctor_ids'].split(',') if value.strip()})
+            except ValueError:
+                return {'status': 'error', 'message': 'doctor_ids must be a comma-separated list of integers'}, 400
+            if len(doctor_ids) > self.MAX_DOCTORS:
+                return {'status': 'error', 'message': f'At most {self.MAX_DOCTORS} doctors per request'}, 400
+            known = {row.id for row in db.session.query(Doctor.id).filter(Doctor.id.in_(doctor_ids))}
+            unknown = [doctor_id for doctor_id in doctor_ids if doctor_id not in known]
+            if unknown:
+                return {'status': 'error', 'message': f'Doctors not found: {", ".join(map(str, unknown))}'}, 404
+        elif specialization:
+            doctor_ids = [row.id for row in db.session.query(Doctor.id)
+                          .filter(Doctor.specialization == specialization, Doctor.is_available.is_(True))
+                          .order_by(Doctor.id).limit(self.MAX_DOCTORS + 1)]
+            if len(doctor_ids) > self.MAX_DOCTORS:
+                return {'status': 'error', 'message': f'More than {self.MAX_DOCTORS} doctors match, '
+                                                      'narrow the search with doctor_ids'}, 400
+        else:
+            return {'status': 'error', 'message': 'doctor_ids or specialization parameter is required'}, 400
+
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        bitmaps = slot_index.booked_many(doctor_ids, days) if doctor_ids else {}
+        schedules = schedule_cache.get_many(doctor_ids) if doctor_ids else {}
+        availability = {
+            str(doctor_id): {
+                day.isoformat(): schedules[doctor_id].template_for(day).free(bitmaps[(doctor_id, day)]) for day in days
+            }
+            for doctor_id in doctor_ids
+        }
+        return {'status': 'success', 'availability': availability}, 200
+
+class FirstAvailableResource(Resource):
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 90
+    DOCTOR_FIELDS = ('id', 'full_name', 'specialization', 'city', 'fees', 'rating')
+
+    @query_budget.limit(8)
+    def get(self):
+        specialization = request.args.get('specialization') or request.args.get('specialty')
+        city = request.args.get('city')
+        if not specialization and not city:
+            return {'status': 'error', 'message': 'specialization or city parameter is required'}, 400
+        try:
+            limit = parse_limit(request.args.get('limit'), self.DEFAULT_LIMIT, self.MAX_LIMIT)
+            start = parse_date(request.args.get('from'), 'from') or date.today()
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+        try:
+            days = int(request.args.get('days') or self.DEFAULT_DAYS)
+        except ValueError:
+            days = 0
+        if not 1 <= days <= self.MAX_DAYS:
+            return {'status': 'error', 'message': f'days must be an integer between 1 and {self.MAX_DAYS}'}, 400
+        end = start + timedelta(days=days - 1)
+        # Slots that have already started are not available.
+        now = datetime.now()
+        start = max(start, now.date())
+        after = to_minutes(now) if start == now.date() else -1
+
+        query = db.session.query(Doctor.id).filter(Doctor.is_available.is_(True))
+        if specialization:
+            query = query.filter(Doctor.specialization == specialization)
+        if city:
+            query = query.filter(Doctor.city == city)
+        doctor_ids = [row.id for row in query]
+
+        slots = next_free_slots.earliest(doctor_ids, start, end, limit, after) if doctor_ids and start <= end else []
+        doctors = {}
+        if slots:
+            serialize = row_serializer_for(Doctor, self.DOCTOR_FIELDS)
+            rows = select_fields(Doctor.query, Doctor, self.DOCTOR_FIELDS) \
+                .filter(Doctor.id.in_({doctor_id for doctor_id, _, _ in slots}))
+            doctors = {row.id: serialize(row) for row in rows}
+        return {
+            'status': 'success',
+            'slots': [
+                {'doctor_id': doctor_id, 'date': day.isoformat(), 'time_slot': time_slot, 'doctor': doctors[doctor_id]}
+                for doctor_id, day, time_slot in slots
+            ]
+        }, 200
+
 class AppointmentsListResource(Resource):
+    SORTS = {
+        'appointment_date': (Appointment.starts_at,),
+        'id': (),
+    }
+
+    @query_budget.limit(2)
     @jwt_required()
     def get(self):
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            fields = parse_fields(request.args.get('fields'), APPOINTMENT_FIELDS)
+            start = parse_date(request.args.get('from'), 'from')
+            end = parse_date(request.args.get('to'), 'to')
+            updated_since = parse_datetime(request.args.get('updated_since'), 'updated_since')
+            sort = request.args.get('sort', 'appointment_date')
+            descending = sort.startswith('-')
+            sort_key = sort.lstrip('-')
+            if sort_key not in self.SORTS:
+                raise ValueError(f'Invalid sort field: {sort_key}')
+            columns = (*self.SORTS[sort_key], Appointment.id)
+            cursor = request.args.get('cursor')
+            after = self.decode_position(cursor, columns) if cursor else None
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            user = Doctor.query.get(user_id)
+        user = current_principal()
             
         if user and user.role == 'doctor':
-            appointments = Appointment.query.filter_by(doctor_id=user.id).all()
+            query = Appointment.query.filter_by(doctor_id=user.id)
         else:
-            appointments = Appointment.query.filter_by(patient_id=user_id).all()
-            
+            query = Appointment.query.filter_by(patient_id=user_id)
+
+        statuses = [status for status in request.args.get('status', '').split(',') if status]
+        if statuses:
+            query = query.filter(Appointment.status.in_(statuses))
+        if start:
+            query = query.filter(Appointment.starts_at >= day_bounds(start)[0])
+        if end:
+            query = query.filter(Appointment.starts_at < day_bounds(end)[1])
+        if updated_since:
+            query = query.filter(Appointment.updated_at >= updated_since)
+        if after:
+            position = db.tuple_(*columns)
+            query = query.filter(position < tuple(after) if descending else position > tuple(after))
+        query = query.order_by(*[column.desc() if descending else column for column in columns])
+        fields = tuple(fields or APPOINTMENT_FIELDS)
+        keys = [column.key for column in columns]
+        query = select_fields(query, Appointment, fields, extra=keys)
+
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor([last[key].isoformat() if isinstance(last[key], date) else last[key]
+                                         for key in keys])
+        serialize = row_serializer_for(Appointment, fields)
         return {
             'status': 'success', 
-            'appointments': [appointment.to_dict() for appointment in appointments]
+            'appointments': [serialize(row) for row in rows],
+            'next_cursor': next_cursor
         }, 200
 
+    def decode_position(self, cursor, columns):
+        values = decode_cursor(cursor, len(columns))
+        try:
+            return [column.type.python_type.fromisoformat(value)
+                    if column.type.python_type in (date, datetime) else column.type.python_type(value)
+                    for column, value in zip(columns, values)]
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+
     @jwt_required()
     def post(self):
         data = request.get_json()
@@ -331,60 +1302,149 @@ class AppointmentsListResource(Resource):
         if missing_fields:
             return {'status': 'error', 'message': f'Missing required fields: {", ".join(missing_fields)}'}, 400
         
-        max_retries = 3
-        retry_count = 0
-        last_error = None
-        
-        while retry_count < max_retries:
+        try:
+            patient_id = get_jwt_identity()
+            
+            if isinstance(data.get('appointment_date'), str):
+                data['appointment_date'] = datetime.strptime(data['appointment_date'], '%Y-%m-%d').date()
+            
+            appointment = write_queue.run(lambda: reserve_appointment(Appointment(
+                patient_id=patient_id,
+                doctor_id=data['doctor_id'],
+                appointment_date=data['appointment_date'],
+                time_slot=data['time_slot'],
+                illness=data['illness'],
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                contact=data['contact'],
+                age=data['age'],
+                gender=data['gender'],
+                status='Confirmed'
+            )))
+            
+            return {'status': 'success', 'appointment': appointment}, 201
+            
+        except SlotUnavailable:
+            return {'status': 'error', 'message': 'This time slot is already booked'}, 409
+        except SlotOutsideSchedule:
+            return {'status': 'error', 'message': 'The doctor does not work at this time'}, 400
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+        except OperationalError as e:
+            if 'database is locked' in str(e).lower():
+                app.logger.warning('Appointment rejected: database is locked')
+                return {'status': 'error', 'message': 'Database busy, please retry'}, 503, {'Retry-After': '1'}
+            app.logger.error(f'Error creating appointment: {str(e)}')
+            return {'status': 'error', 'message': f'Error creating appointment: {str(e)}'}, 500
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'Error creating appointment: {str(e)}')
+            return {'status': 'error', 'message': f'Error creating appointment: {str(e)}'}, 500
+
+class AppointmentsBulkResource(Resource):
+    MAX_ITEMS = 500
+    REQUIRED_FIELDS = ('doctor_id', 'appointment_date', 'time_slot', 'illness',
+                       'first_name', 'last_name', 'contact', 'age', 'gender')
+
+    def parse_item(self, item, patient_id):
+        if not isinstance(item, dict):
+            raise ValueError('Appointment must be an object')
+        missing_fields = [field for field in self.REQUIRED_FIELDS if field not in item]
+        if missing_fields:
+            raise ValueError(f'Missing required fields: {", ".join(missing_fields)}')
+        if patient_id is None and 'patient_id' not in item:
+            raise ValueError('Missing required fields: patient_id')
+        parse_slot_label(item['time_slot'])
+        try:
+            appointment_date = datetime.strptime(item['appointment_date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise ValueError('Invalid date format, should be YYYY-MM-DD')
+        try:
+            doctor_id = int(item['doctor_id'])
+            age = int(item['age'])
+            patient_id = int(item['patient_id']) if patient_id is None else patient_id
+        except (TypeError, ValueError):
+            raise ValueError('doctor_id, patient_id and age must be integers')
+        return Appointment(
+            patient_id=patient_id,
+            doctor_id=doctor_id,
+            appointment_date=appointment_date,
+            time_slot=item['time_slot'],
+            illness=item['illness'],
+            first_name=item['first_name'],
+            last_name=item['last_name'],
+            contact=item['contact'],
+            age=age,
+            gender=item['gender'],
+            status='Confirmed'
+        )
+
+    @jwt_required()
+    def post(self):
+        data = request.get_json(silent=True)
+        items = data.get('appointments') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return {'status': 'error', 'message': 'appointments must be a non-empty list'}, 400
+        if len(items) > self.MAX_ITEMS:
+            return {'status': 'error', 'message': f'At most {self.MAX_ITEMS} appointments per request'}, 400
+
+        user = current_principal()
+        patient_id = None if user and user.principal_type == 'admin' else get_jwt_identity()
+        results = [None] * len(items)
+        parsed = []
+        for index, item in enumerate(items):
             try:
-                patient_id = get_jwt_identity()
-                
-                if isinstance(data.get('appointment_date'), str):
-                    data['appointment_date'] = datetime.strptime(data['appointment_date'], '%Y-%m-%d').date()
-                
-                appointment = Appointment(
-                    patient_id=patient_id,
-                    doctor_id=data['doctor_id'],
-                    appointment_date=data['appointment_date'],
-                    time_slot=data['time_slot'],
-                    illness=data['illness'],
-                    first_name=data['first_name'],
-                    last_name=data['last_name'],
-                    contact=data['contact'],
-                    age=data['age'],
-                    gender=data['gender'],
-                    status='Confirmed'
-                )
-                
-                db.session.add(appointment)
-                db.session.commit()
-                
-                return {'status': 'success', 'appointment': appointment.to_dict()}, 201
-                
-            except Exception as e:
-                db.session.rollback()
-                last_error = str(e)
-                retry_count += 1
-                
+                parsed.append((index, self.parse_item(item, patient_id)))
+            except ValueError as e:
+                results[index] = {'index': index, 'status': 'error', 'code': 400, 'message': str(e)}
+
+        doctor_ids = {appointment.doctor_id for _, appointment in parsed}
+        known_doctors = {row.id for row in db.session.query(Doctor.id).filter(Doctor.id.in_(doctor_ids))}
+        schedules = schedule_cache.get_many(known_doctors) if known_doctors else {}
+        pending = []
+        for index, appointment in parsed:
+            if appointment.doctor_id not in known_doctors:
+                results[index] = {'index': index, 'status': 'error', 'code': 404, 'message': 'Doctor not found'}
+            elif not schedules[appointment.doctor_id].template_for(appointment.appointment_date).accepts(
+                    *parse_slot_label(appointment.time_slot)):
+                results[index] = {'index': index, 'status': 'error', 'code': 400,
+                                  'message': 'The doctor does not work at this time'}
+            else:
+                pending.append((index, appointment))
+
+        if pending:
+            try:
+                reserved = write_queue.run(lambda: reserve_appointments([appointment for _, appointment in pending]))
+            except SlotUnavailable:
+                return {'status': 'error', 'message': 'A time slot was booked concurrently, please retry'}, 409
+            except OperationalError as e:
                 if 'database is locked' in str(e).lower():
-                    time.sleep(0.5 * retry_count)
-                    continue
+                    app.logger.warning('Bulk appointments rejected: database is locked')
+                    return {'status': 'error', 'message': 'Database busy, please retry'}, 503, {'Retry-After': '1'}
+                app.logger.error(f'Error creating appointments: {str(e)}')
+                return {'status': 'error', 'message': f'Error creating appointments: {str(e)}'}, 500
+            for (index, _), appointment in zip(pending, reserved):
+                if appointment is None:
+                    results[index] = {'index': index, 'status': 'error', 'code': 409,
+                                      'message': 'This time slot is already booked'}
                 else:
-                    break
-        
-        app.logger.error(f'Error creating appointment after {retry_count} retries: {last_error}')
-        return {'status': 'error', 'message': f'Error creating appointment: {last_error}'}, 500
+                    results[index] = {'index': index, 'status': 'created', 'appointment': appointment}
+
+        created = sum(1 for result in results if result['status'] == 'created')
+        return {
+            'status': 'success',
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }, 200
 
 class AppointmentResource(Resource):
+    @query_budget.limit(2)
     @jwt_required()
     def get(self, appointment_id):
         appointment = Appointment.query.get_or_404(appointment_id)
         
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            user = Doctor.query.get(user_id)
+        user = current_principal()
             
         if (user and (user.role == 'admin' or 
             (user.role == 'doctor' and user.id == appointment.doctor_id) or 
@@ -397,10 +1457,7 @@ class AppointmentResource(Resource):
     def put(self, appointment_id):
         appointment = Appointment.query.get_or_404(appointment_id)
         
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user:
-            user = Doctor.query.get(user_id)
+        user = current_principal()
             
         if not (user and (user.role == 'admin' or 
                 (user.role == 'doctor' and user.id == appointment.doctor_id) or 
@@ -418,15 +1475,18 @@ class AppointmentResource(Resource):
             if 'follow_up_date' in data and data['follow_up_date'] and isinstance(data['follow_up_date'], str):
                 data['follow_up_date'] = datetime.strptime(data['follow_up_date'], '%Y-%m-%d').date()
                 
-            for key, value in data.items():
-                if hasattr(appointment, key):
-                    setattr(appointment, key, value)
-            
-            db.session.commit()
-            return {'status': 'success', 'appointment': appointment.to_dict()}, 200
+            updated = write_queue.run(lambda: apply_appointment_changes(appointment_id, data))
+            return {'status': 'success', 'appointment': updated}, 200
             
+        except SlotUnavailable:
+            return {'status': 'error', 'message': 'This time slot is already booked'}, 409
+        except IntegrityError as e:
+            return {'status': 'error', 'message': f'Invalid appointment data: {e.orig}'}, 400
+        except SlotOutsideSchedule:
+            return {'status': 'error', 'message': 'The doctor does not work at this time'}, 400
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
         except Exception as e:
-            db.session.rollback()
             app.logger.error(f'Error updating appointment: {str(e)}')
             return {'status': 'error', 'message': f'Error updating appointment: {str(e)}'}, 500
 
@@ -434,10 +1494,7 @@ class AppointmentResource(Resource):
     def delete(self, appointment_id):
         appointment = Appointment.query.get_or_404(appointment_id)
         
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user:
-            user = Doctor.query.get(user_id)
+        user = current_principal()
             
         if not (user and (user.role == 'admin' or 
                 (user.role == 'doctor' and user.id == appointment.doctor_id) or 
@@ -445,24 +1502,172 @@ class AppointmentResource(Resource):
             return {'status': 'error', 'message': 'Not authorized to delete this appointment'}, 403
             
         try:
-            db.session.delete(appointment)
-            db.session.commit()
+            write_queue.run(lambda: remove_appointment(appointment_id))
             return {'status': 'success', 'message': 'Appointment deleted successfully'}, 200
         except Exception as e:
-            db.session.rollback()
             app.logger.error(f'Error deleting appointment: {str(e)}')
             return {'status': 'error', 'message': f'Error deleting appointment: {str(e)}'}, 500
 
+class DoctorScheduleResource(Resource):
+    MIN_SLOT_MINUTES = 5
+    MAX_SLOT_MINUTES = 8 * 60
+
+    @staticmethod
+    def describe(template):
+        return {
+            'hours': [{'start': format_minutes(start), 'end': format_minutes(end), 'slot_minutes': slot_minutes}
+                      for start, end, slot_minutes in template.intervals],
+            'slots': list(template.labels),
+        }
+
+    @query_budget.limit(3)
+    def get(self, doctor_id):
+        if db.session.get(Doctor, doctor_id) is None:
+            return {'status': 'error', 'message': 'Doctor not found'}, 404
+        schedule = schedule_cache.get(doctor_id)
+        today = date.today()
+        return {
+            'status': 'success',
+            'schedule': {
+                'doctor_id': doctor_id,
+                'weekly': [{'weekday': weekday, **self.describe(template)}
+                           for weekday, template in enumerate(schedule.weekly)],
+                'exceptions': [{'date': day.isoformat(), **self.describe(template)}
+                               for day, template in sorted(schedule.exceptions.items()) if day >= today],
+            }
+        }, 200
+
+    def parse_hours(self, hours, context):
+        if not isinstance(hours, list):
+            raise ValueError(f'{context}: hours must be a list')
+        intervals = []
+        for interval in hours:
+            if not isinstance(interval, dict):
+                raise ValueError(f'{context}: each interval must be an object')
+            try:
+                start = datetime.strptime(interval['start'], '%H:%M').time()
+                end = datetime.strptime(interval['end'], '%H:%M').time()
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f'{context}: start and end must be times in HH:MM format')
+            slot_minutes = interval.get('slot_minutes', 60)
+            if not isinstance(slot_minutes, int) or not self.MIN_SLOT_MINUTES <= slot_minutes <= self.MAX_SLOT_MINUTES \
+                    or slot_minutes % UNIT_MINUTES:
+                raise ValueError(f'{context}: slot_minutes must be a multiple of {UNIT_MINUTES} '
+                                 f'between {self.MIN_SLOT_MINUTES} and {self.MAX_SLOT_MINUTES}')
+            if to_minutes(start) % UNIT_MINUTES or to_minutes(end) % UNIT_MINUTES:
+                raise ValueError(f'{context}: times must fall on {UNIT_MINUTES}-minute boundaries')
+            if to_minutes(end) - to_minutes(start) < slot_minutes:
+                raise ValueError(f'{context}: {interval["start"]}-{interval["end"]} is shorter than one slot')
+            intervals.append((start, end, slot_minutes))
+        intervals.sort()
+        for (_, previous_end, _), (start, _, _) in zip(intervals, intervals[1:]):
+            if start < previous_end:
+                raise ValueError(f'{context}: working hours overlap')
+        return intervals
+
+    def parse_weekly(self, weekly):
+        if not isinstance(weekly, list):
+            raise ValueError('weekly must be a list')
+        rows = []
+        seen = set()
+        for entry in weekly:
+            weekday = entry.get('weekday') if isinstance(entry, dict) else None
+            if not isinstance(weekday, int) or not 0 <= weekday < WEEKDAYS or weekday in seen:
+                raise ValueError('each weekly entry needs a distinct weekday from 0 (Monday) to 6')
+            seen.add(weekday)
+            rows.extend(WorkingHours(weekday=weekday, start_time=start, end_time=end, slot_minutes=slot_minutes)
+                        for start, end, slot_minutes in self.parse_hours(entry.get('hours'), f'weekday {weekday}'))
+        return rows
+
+    def parse_exceptions(self, exceptions):
+        if not isinstance(exceptions, list):
+            raise ValueError('exceptions must be a list')
+        rows = []
+        seen = set()
+        for entry in exceptions:
+            try:
+                day = datetime.strptime(entry['date'], '%Y-%m-%d').date()
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('each exception needs a date in YYYY-MM-DD format')
+            if day in seen:
+                raise ValueError(f'{day}: duplicate exception')
+            seen.add(day)
+            hours = self.parse_hours(entry.get('hours') or [], str(day))
+            if not hours:
+                rows.append(ScheduleException(date=day))
+            rows.extend(ScheduleException(date=day, start_time=start, end_time=end, slot_minutes=slot_minutes)
+                        for start, end, slot_minutes in hours)
+        return rows
+
+    @jwt_required()
+    def put(self, doctor_id):
+        user = current_principal()
+        if not (user and (user.role == 'admin' or (user.role == 'doctor' and user.id == doctor_id))):
+            return {'status': 'error', 'message': 'Not authorized to change this schedule'}, 403
+        if db.session.get(Doctor, doctor_id) is None:
+            return {'status': 'error', 'message': 'Doctor not found'}, 404
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not {'weekly', 'exceptions'} & data.keys():
+            return {'status': 'error', 'message': 'weekly or exceptions must be provided'}, 400
+        try:
+            hours = self.parse_weekly(data['weekly']) if 'weekly' in data else None
+            exceptions = self.parse_exceptions(data['exceptions']) if 'exceptions' in data else None
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+        write_queue.run(lambda: replace_schedule(doctor_id, hours, exceptions))
+        return self.get(doctor_id)
+
+class ChangesResource(Resource):
+    @query_budget.limit(5)
+    @jwt_required()
+    def get(self):
+        user = current_principal()
+        if not (user and user.principal_type == 'admin'):
+            return {'status': 'error', 'message': 'Admin access required'}, 403
+        try:
+            after = int(request.args.get('after') or 0)
+            if after < 0:
+                raise ValueError()
+        except ValueError:
+            return {'status': 'error', 'message': 'after must be a non-negative integer'}, 400
+        try:
+            limit = parse_limit(request.args.get('limit'), maximum=1000)
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
+        changes = ChangeLog.query.filter(ChangeLog.seq > after).order_by(ChangeLog.seq).limit(limit + 1).all()
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        # Inserts and updates carry the row as it is now; deletes carry its last known state.
+        ids = defaultdict(set)
+        for change in changes:
+            if change.operation != 'delete':
+                ids[change.entity].add(change.entity_id)
+        current = {
+            entity: {row.id: row.to_dict() for row in CHANGE_FEED_MODELS[entity].query.filter(
+                CHANGE_FEED_MODELS[entity].id.in_(entity_ids))}
+            for entity, entity_ids in ids.items()
+        }
+        return {
+            'status': 'success',
+            'changes': [{
+                'seq': change.seq,
+                'entity': change.entity,
+                'id': change.entity_id,
+                'operation': change.operation,
+                'changed_at': change.changed_at.isoformat(),
+                'data': app.json.loads(change.data) if change.operation == 'delete' and change.data
+                else current.get(change.entity, {}).get(change.entity_id),
+            } for change in changes],
+            'last_seq': changes[-1].seq if changes else after,
+            'has_more': has_more,
+        }, 200
+
 class CurrentUserResource(Resource):
+    @query_budget.limit(1)
     @jwt_required()
     def get(self):
-        user_id = get_jwt_identity()
-        
-        user = User.query.get(user_id)
-        if not user:
-            user = Doctor.query.get(user_id)
-        if not user:
-            user = Admin.query.get(user_id)
+        user = current_principal()
             
         if not user:
             return {'status': 'error', 'message': 'User not found'}, 404
@@ -472,7 +1677,7 @@ class CurrentUserResource(Resource):
 class HealthCheckResource(Resource):
     def get(self):
         try:
-            db.session.execute('SELECT 1')
+            db.session.execute(db.text('SELECT 1'))
             return {
                 'status': 'success',
                 'message': 'API is healthy',
@@ -488,7 +1693,8 @@ class HealthCheckResource(Resource):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    principal_type, _, principal_id = user_id.rpartition(':')
+    return load_principal(principal_type or 'user', principal_id)
 
 def admin_required(func):
     @wraps(func)
@@ -509,15 +1715,7 @@ def super_admin_required(func):
     return wrapper
 
 def setup_logging(app):
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-    file_handler = RotatingFileHandler('logs/app.log', maxBytes=10240, backupCount=10)
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.setLevel(logging.INFO)
+    RequestLogging(app)
     app.logger.info('Healthcare Appointment System startup')
 
 @jwt.unauthorized_loader
@@ -582,15 +1780,13 @@ def login():
         email = request.form.get("email")
         password = request.form.get("password")
         
-        user = User.query.filter_by(email=email).first()
-        
-        if not user:
-            user = Doctor.query.filter_by(email=email).first()
-        
-        if not user:
-            user = Admin.query.filter_by(email=email).first()
+        try:
+            user = authenticate(email, password)
+        except PasswordHasherBusy:
+            flash("Server busy, please try again in a moment.", "danger")
+            return render_template("login.html"), 503
 
-        if user and user.check_password(password):
+        if user:
             login_user(user)
             flash("Login successful!", "success")
             return redirect(url_for("landing"))
@@ -614,25 +1810,22 @@ def register():
             flash("Passwords do not match!", "danger")
             return redirect(url_for("register"))
         
-        if User.query.filter_by(email=email).first() or \
-           Doctor.query.filter_by(email=email).first() or \
-           Admin.query.filter_by(email=email).first():
+        if email_exists(email):
             flash("Email already exists!", "danger")
             return redirect(url_for("register"))
         
         try:
-            new_user = User(
+            password_hash = password_hasher.generate_password_hash(password)
+            write_queue.run(lambda: create_principal(
+                User,
                 full_name=name,
                 email=email,
-                role="patient"
-            )
-            new_user.set_password(password)
-            db.session.add(new_user)
-            db.session.commit()
+                role="patient",
+                password_hash=password_hash
+            ))
             flash("Registration successful! Please log in.", "success")
             return redirect(url_for("login"))
         except Exception as e:
-            db.session.rollback()
             app.logger.error(f'Error creating user: {str(e)}')
             flash("An error occurred during registration. Please try again.", "danger")
             return redirect(url_for("register"))
@@ -653,12 +1846,16 @@ def profile():
 
 @app.route("/appointments")
 @login_required
+@query_budget.limit(3)
 def appointments():
     if current_user.role == "doctor":
-        appointments = Appointment.query.filter_by(doctor_id=current_user.id).all()
+        query = Appointment.query.filter_by(doctor_id=current_user.id)
     else:
-        appointments = Appointment.query.filter_by(patient_id=current_user.id).all()
-    return render_template("appointments.html", appointments=appointments)
+        query = Appointment.query.filter_by(patient_id=current_user.id)
+    filters = table_filters(('status', 'from', 'to'))
+    query = filter_appointments(query, filters)
+    pagination = paginate_table(query, APPOINTMENT_TABLE_SORTS, '-appointment_date', options=APPOINTMENT_PEOPLE)
+    return render_template("appointments.html", appointments=pagination.items, pagination=pagination, filters=filters)
 
 @app.route("/admin/create-doctor", methods=["GET", "POST"])
 @login_required
@@ -674,9 +1871,7 @@ def create_doctor():
         city = request.form.get("city")
         fees = request.form.get("fees")
         
-        if User.query.filter_by(email=email).first() or \
-           Doctor.query.filter_by(email=email).first() or \
-           Admin.query.filter_by(email=email).first():
+        if email_exists(email):
             flash("Email already exists!", "danger")
             return redirect(url_for("create_doctor"))
         
@@ -684,7 +1879,9 @@ def create_doctor():
             flash("Doctor ID already exists!", "danger")
             return redirect(url_for("create_doctor"))
         
-        new_doctor = Doctor(
+        password_hash = password_hasher.generate_password_hash(password)
+        write_queue.run(lambda: create_principal(
+            Doctor,
             full_name=name,
             email=email,
             user_id=doctor_id,
@@ -692,11 +1889,9 @@ def create_doctor():
             experience=experience,
             city=city,
             fees=fees,
-            role="doctor"
-        )
-        new_doctor.set_password(password)
-        db.session.add(new_doctor)
-        db.session.commit()
+            role="doctor",
+            password_hash=password_hash
+        ))
         flash("Doctor account created successfully!", "success")
         return redirect(url_for("admin_dashboard"))
     
@@ -705,40 +1900,63 @@ def create_doctor():
 @app.route("/admin/dashboard")
 @login_required
 @admin_required
+@query_budget.limit(4)
 def admin_dashboard():
-    doctors = Doctor.query.all()
-    patients = User.query.filter_by(role="patient").all()
-    return render_template("admin/dashboard.html", doctors=doctors, patients=patients)
+    counts = read_counters()
+    doctors = Doctor.query.order_by(Doctor.id.desc()).limit(DASHBOARD_ROWS).all()
+    patients = User.query.filter_by(role="patient").order_by(User.id.desc()).limit(DASHBOARD_ROWS).all()
+    return render_template("admin/dashboard.html", doctors=doctors, patients=patients,
+                           total_doctors=counts.get('doctors', 0), total_patients=counts.get('users:patient', 0))
 
 @app.route("/super-admin/dashboard")
 @login_required
 @super_admin_required
+@query_budget.limit(6)
 def super_admin_dashboard():
-    admins = Admin.query.all()
-    doctors = Doctor.query.all()
-    patients = User.query.filter_by(role="patient").all()
+    counts = read_counters()
+    admins = Admin.query.order_by(Admin.id.desc()).limit(DASHBOARD_ROWS).all()
+    doctors = Doctor.query.order_by(Doctor.id.desc()).limit(DASHBOARD_ROWS).all()
+    patients = User.query.filter_by(role="patient").order_by(User.id.desc()).limit(DASHBOARD_ROWS).all()
     return render_template("admin/super_dashboard.html", 
                          admins=admins, 
                          doctors=doctors, 
-                         patients=patients)
+                         patients=patients,
+                         total_admins=count_rows(Admin.query),
+                         total_doctors=counts.get('doctors', 0),
+                         total_patients=counts.get('users:patient', 0))
 
 @app.route("/admin/appointments")
 @login_required
 @admin_required
+@query_budget.limit(3)
 def admin_appointments():
-    appointments = Appointment.query.all()
-    return render_template("admin/appointments.html", appointments=appointments)
+    filters = table_filters(('status', 'doctor_id', 'patient_id', 'from', 'to'))
+    query = filter_appointments(Appointment.query, filters)
+    counter = None
+    if not filters:
+        counter = 'appointments'
+    elif list(filters) == ['status']:
+        counter = f"appointments:{filters['status']}"
+    pagination = paginate_table(query, APPOINTMENT_TABLE_SORTS, '-appointment_date', counter, APPOINTMENT_PEOPLE)
+    return render_template("admin/appointments.html", appointments=pagination.items, pagination=pagination,
+                           filters=filters)
 
 @app.route("/admin/appointments/<int:appointment_id>/update", methods=["POST"])
 @login_required
 @admin_required
 def update_appointment_status(appointment_id):
-    appointment = Appointment.query.get_or_404(appointment_id)
+    Appointment.query.get_or_404(appointment_id)
     new_status = request.form.get("status")
     if new_status in ["Confirmed", "Cancelled", "Completed"]:
-        appointment.status = new_status
-        db.session.commit()
-        flash(f"Appointment status updated to {new_status}", "success")
+        try:
+            write_queue.run(lambda: apply_appointment_changes(appointment_id, {'status': new_status}))
+            flash(f"Appointment status updated to {new_status}", "success")
+        except SlotUnavailable:
+            flash("That time slot has already been booked again", "danger")
+        except IntegrityError:
+            flash("The appointment could not be updated", "danger")
+        except (SlotOutsideSchedule, ValueError):
+            flash("The doctor no longer works at this time", "danger")
     else:
         flash("Invalid status", "danger")
     return redirect(url_for("admin_appointments"))
@@ -747,24 +1965,26 @@ def update_appointment_status(appointment_id):
 @login_required
 @admin_required
 def delete_appointment(appointment_id):
-    appointment = Appointment.query.get_or_404(appointment_id)
-    db.session.delete(appointment)
-    db.session.commit()
+    Appointment.query.get_or_404(appointment_id)
+    write_queue.run(lambda: remove_appointment(appointment_id))
     flash("Appointment deleted successfully", "success")
     return redirect(url_for("admin_appointments"))
 
 @app.route("/admin/statistics")
 @login_required
 @admin_required
+@query_budget.limit(3)
 def admin_statistics():
-    total_doctors = Doctor.query.count()
-    total_patients = User.query.filter_by(role="patient").count()
-    total_appointments = Appointment.query.count()
-    recent_appointments = Appointment.query.order_by(Appointment.created_at.desc()).limit(5).all()
+    counts = read_counters()
+    total_doctors = counts.get('doctors', 0)
+    total_patients = counts.get('users:patient', 0)
+    total_appointments = counts.get('appointments', 0)
+    recent_appointments = Appointment.query.options(*APPOINTMENT_PEOPLE) \
+        .order_by(Appointment.created_at.desc()).limit(5).all()
     
-    confirmed_appointments = Appointment.query.filter_by(status="Confirmed").count()
-    cancelled_appointments = Appointment.query.filter_by(status="Cancelled").count()
-    completed_appointments = Appointment.query.filter_by(status="Completed").count()
+    confirmed_appointments = counts.get('appointments:Confirmed', 0)
+    cancelled_appointments = counts.get('appointments:Cancelled', 0)
+    completed_appointments = counts.get('appointments:Completed', 0)
     
     return render_template("admin/statistics.html",
                          total_doctors=total_doctors,
@@ -778,37 +1998,63 @@ def admin_statistics():
 @app.route("/admin/doctors")
 @login_required
 @admin_required
+@query_budget.limit(3)
 def admin_doctors():
-    doctors = Doctor.query.all()
-    return render_template("admin/doctors.html", doctors=doctors)
+    filters = table_filters(('name', 'specialization', 'city', 'available'))
+    query = Doctor.query
+    if 'name' in filters:
+        query = query.filter(Doctor.full_name.like(escape_like(filters['name']) + '%', escape='\\'))
+    if 'specialization' in filters:
+        query = query.filter(Doctor.specialization == filters['specialization'])
+    if 'city' in filters:
+        query = query.filter(Doctor.city == filters['city'])
+    if 'available' in filters:
+        try:
+            query = query.filter(Doctor.is_available == parse_bool(filters['available']))
+        except ValueError as e:
+            flash(str(e), "danger")
+    pagination = paginate_table(query, DOCTOR_TABLE_SORTS, 'full_name', None if filters else 'doctors')
+    return render_template("admin/doctors.html", doctors=pagination.items, pagination=pagination, filters=filters)
 
 @app.route("/admin/doctors/<int:doctor_id>/update", methods=["POST"])
 @login_required
 @admin_required
 def update_doctor_status(doctor_id):
-    doctor = Doctor.query.get_or_404(doctor_id)
-    doctor.is_available = not doctor.is_available
-    db.session.commit()
-    status = "available" if doctor.is_available else "unavailable"
+    Doctor.query.get_or_404(doctor_id)
+    is_available = write_queue.run(lambda: toggle_doctor_availability(doctor_id))
+    status = "available" if is_available else "unavailable"
     flash(f"Doctor is now {status}", "success")
     return redirect(url_for("admin_doctors"))
 
 @app.route("/admin/patients")
 @login_required
 @admin_required
+@query_budget.limit(3)
 def admin_patients():
-    patients = User.query.filter_by(role="patient").all()
-    return render_template("admin/patients.html", patients=patients)
+    filters = table_filters(('name', 'email'))
+    query = User.query.filter_by(role="patient")
+    if 'name' in filters:
+        query = query.filter(User.full_name.like(escape_like(filters['name']) + '%', escape='\\'))
+    if 'email' in filters:
+        query = query.filter(User.email.like(escape_like(filters['email']) + '%', escape='\\'))
+    pagination = paginate_table(query, PATIENT_TABLE_SORTS, 'full_name', None if filters else 'users:patient')
+    return render_template("admin/patients.html", patients=pagination.items, pagination=pagination, filters=filters)
 
 @app.route("/admin/patients/<int:patient_id>/appointments")
 @login_required
 @admin_required
+@query_budget.limit(4)
 def patient_appointments(patient_id):
     patient = User.query.get_or_404(patient_id)
-    appointments = Appointment.query.filter_by(patient_id=patient_id).all()
+    filters = table_filters(('status', 'from', 'to'))
+    query = filter_appointments(Appointment.query.filter_by(patient_id=patient_id), filters)
+    pagination = paginate_table(query, APPOINTMENT_TABLE_SORTS, '-appointment_date',
+                                options=(db.joinedload(Appointment.doctor),))
     return render_template("admin/patient_appointments.html", 
                          patient=patient, 
-                         appointments=appointments)
+                         appointments=pagination.items,
+                         pagination=pagination,
+                         filters=filters)
 
 @app.route('/api/doctors/<int:doctor_id>/slots', methods=['GET'])
 def get_doctor_available_slots(doctor_id):
@@ -820,14 +2066,8 @@ def get_doctor_available_slots(doctor_id):
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid date format, should be YYYY-MM-DD'}), 400
 
-    start_hour = 9
-    end_hour = 18
-    all_slots = [f"{hour:02d}:00 - {hour+1:02d}:00" for hour in range(start_hour, end_hour)]
-
-    booked_appointments = Appointment.query.filter_by(doctor_id=doctor_id, appointment_date=date_obj).all()
-    booked_slots = set([appt.time_slot for appt in booked_appointments])
-
-    available_slots = [slot for slot in all_slots if slot not in booked_slots]
+    template = schedule_cache.get(doctor_id).template_for(date_obj)
+    available_slots = template.free(slot_index.booked(doctor_id, date_obj))
 
     return jsonify({'status': 'success', 'slots': available_slots}), 200
 
@@ -844,32 +2084,139 @@ def book_appointment(doctor_id):
         contact = getattr(current_user, 'phone', '') or ""
         age = getattr(current_user, 'age', 25) if hasattr(current_user, 'age') else 25
         gender = getattr(current_user, 'gender', 'male') if hasattr(current_user, 'gender') else 'male'
-        appointment = Appointment(
-            doctor_id=doctor.id,
-            patient_id=current_user.id,
-            appointment_date=datetime.strptime(appointment_date, "%Y-%m-%d"),
-            time_slot=time_slot,
-            illness=illness,
-            first_name=first_name,
-            last_name=last_name,
-            contact=contact,
-            age=age,
-            gender=gender,
-            status="Confirmed"
-        )
-        db.session.add(appointment)
-        db.session.commit()
+        patient_id = current_user.id
+        try:
+            write_queue.run(lambda: reserve_appointment(Appointment(
+                doctor_id=doctor_id,
+                patient_id=patient_id,
+                appointment_date=datetime.strptime(appointment_date, "%Y-%m-%d").date(),
+                time_slot=time_slot,
+                illness=illness,
+                first_name=first_name,
+                last_name=last_name,
+                contact=contact,
+                age=age,
+                gender=gender,
+                status="Confirmed"
+            )))
+        except SlotUnavailable:
+            flash("This time slot is already booked. Please choose another.", "danger")
+            return redirect(url_for("book_appointment", doctor_id=doctor_id))
+        except SlotOutsideSchedule:
+            flash("The doctor does not work at this time. Please choose another slot.", "danger")
+            return redirect(url_for("book_appointment", doctor_id=doctor_id))
+        except ValueError:
+            flash("Please choose a valid date and time slot.", "danger")
+            return redirect(url_for("book_appointment", doctor_id=doctor_id))
         flash("Appointment booked successfully!", "success")
         return redirect(url_for("landing"))
     return render_template("doctors/detail.html", doctor=doctor)
 
+def hot_queries():
+    return {
+        'principal by email': principal_by_email_query('patient@example.com'),
+        'doctors by specialization': Doctor.query.filter(Doctor.specialization == 'Cardiology')
+            .order_by(DoctorsListResource.SORTS['rating'].desc(), Doctor.id.desc()),
+        'doctors by city': Doctor.query.filter(Doctor.city == 'Pune'),
+        'doctors by rating': Doctor.query.order_by(DoctorsListResource.SORTS['rating'].desc(), Doctor.id.desc())
+            .limit(51),
+        'doctors by rating, next page': Doctor.query
+            .filter(keyset_after(DoctorsListResource.SORTS['rating'], Doctor.id, (4.5, 100), True))
+            .order_by(DoctorsListResource.SORTS['rating'].desc(), Doctor.id.desc()).limit(51),
+        'doctors by experience': Doctor.query.order_by(DoctorsListResource.SORTS['experience'], Doctor.id).limit(51),
+        'doctors by city and experience': Doctor.query.filter(Doctor.city == 'Pune')
+            .order_by(DoctorsListResource.SORTS['experience'].desc(), Doctor.id.desc()).limit(51),
+        'doctors by specialization and experience, next page': Doctor.query
+            .filter(Doctor.specialization == 'Cardiology',
+                    keyset_after(DoctorsListResource.SORTS['experience'], Doctor.id, (10, 100), False))
+            .order_by(DoctorsListResource.SORTS['experience'], Doctor.id).limit(51),
+        'doctor search': Doctor.query.join(doctor_search, doctor_search.c.rowid == Doctor.id)
+            .filter(db.literal_column(SEARCH_TABLE).op('MATCH')(match_expression('card pune')))
+            .order_by(doctor_search.c.rank, Doctor.id).limit(51),
+        'doctors by name prefix': Doctor.query.filter(Doctor.full_name.like('ann%', escape='\\'))
+            .order_by(Doctor.id).limit(51),
+        'appointments by doctor': Appointment.query.filter_by(doctor_id=1),
+        'appointments by patient': Appointment.query.filter_by(patient_id=1),
+        'doctor agenda': Appointment.query.filter(Appointment.doctor_id == 1,
+                                                  Appointment.starts_at >= day_bounds(date.today())[0])
+            .order_by(*AppointmentsListResource.SORTS['appointment_date'], Appointment.id).limit(51),
+        'patient agenda': Appointment.query.filter(Appointment.patient_id == 1,
+                                                   Appointment.starts_at >= day_bounds(date.today())[0])
+            .order_by(*AppointmentsListResource.SORTS['appointment_date'], Appointment.id).limit(51),
+        'doctor day slots': db.session.query(Appointment.starts_at, Appointment.ends_at)
+            .filter(Appointment.doctor_id == 1, starts_between(date.today()), Appointment.status != 'Cancelled'),
+        'appointments next week': Appointment.query.filter(
+            starts_between(date.today() + timedelta(days=7), date.today() + timedelta(days=13))),
+        'appointments by status': Appointment.query.filter_by(status='Confirmed'),
+        'appointments by date': Appointment.query.order_by(Appointment.starts_at.desc(), Appointment.id.desc())
+            .limit(25),
+        'recent appointments': Appointment.query.order_by(Appointment.created_at.desc()).limit(5),
+    }
+
+@app.cli.command('rebuild-counters')
+def rebuild_counters_command():
+    """Recount doctors, users and appointments into the counters table."""
+    for name, value in sorted(rebuild_counters().items()):
+        click.echo(f'{name}: {value}')
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Create the doctor search index if missing and refill it from the doctors table."""
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+        rebuild_search_index(connection)
+    click.echo('Doctor search index rebuilt')
+
+@app.cli.command('compress-static')
+def compress_static_command():
+    """Write precompressed .gz/.br variants of the static CSS and JS files."""
+    for path, size, variants in compress_static(app.static_folder, app.config['COMPRESS_STATIC_DIRS']):
+        sizes = ', '.join(f'{encoding} {length}' for encoding, length in sorted(variants.items()))
+        click.echo(f'{os.path.relpath(path, app.static_folder)}: {size} -> {sizes}')
+
+# These read their (few) matches through a text index, so they sort them:
+# relevance is computed per match, and a name prefix range is not in id order.
+SORTED_HOT_QUERIES = {'doctor search', 'doctors by name prefix'}
+
+def query_plan(connection, query):
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+
+def query_plan_problems(details, sorts=False):
+    problems = []
+    if any(detail.startswith('SCAN') and 'USING' not in detail and 'VIRTUAL TABLE INDEX' not in detail
+           for detail in details):
+        problems.append('FULL SCAN')
+    if not sorts and any('TEMP B-TREE' in detail for detail in details):
+        problems.append('TEMP B-TREE')
+    return problems
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Fail if any API hot query falls back to a full table scan or a sort."""
+    failures = []
+    with db.engine.connect() as connection:
+        for name, query in hot_queries().items():
+            details = query_plan(connection, query)
+            problems = query_plan_problems(details, name in SORTED_HOT_QUERIES)
+            if problems:
+                failures.append(name)
+            click.echo(f"{', '.join(problems) or 'ok':<12}{name}: {'; '.join(details)}")
+    if failures:
+        raise SystemExit(f'Full table scans or sorts in: {", ".join(failures)}')
+
 api.add_resource(LoginResource, '/api/login/')
 api.add_resource(RegisterResource, '/api/register', '/api/register/')
 api.add_resource(DoctorsListResource, '/api/doctors/')
 api.add_resource(DoctorResource, '/api/doctors/<int:doctor_id>/')
+api.add_resource(DoctorScheduleResource, '/api/doctors/<int:doctor_id>/schedule/')
+api.add_resource(AvailabilityResource, '/api/availability/')
+api.add_resource(FirstAvailableResource, '/api/availability/first/')
 api.add_resource(AppointmentsListResource, '/api/appointments/')
+api.add_resource(AppointmentsBulkResource, '/api/appointments/bulk/')
 api.add_resource(AppointmentResource, '/api/appointments/<int:appointment_id>/')
 api.add_resource(CurrentUserResource, '/api/me/')
+api.add_resource(ChangesResource, '/api/changes', '/api/changes/')
 api.add_resource(HealthCheckResource, '/api/health/')
 
 if __name__ == '__main__':
@@ -878,6 +2225,12 @@ if __name__ == '__main__':
     
     with app.app_context():
         db.create_all()
+        sync_identity_directory()
+        if db.session.query(Counter.name).first() is None:
+            rebuild_counters()
+        with db.engine.begin() as connection:
+            create_search_index(connection)
+        compress_static(app.static_folder, app.config['COMPRESS_STATIC_DIRS'])
         
         if not Admin.query.filter_by(is_super_admin=True).first():
             create_super_admin()
@@ -0,0 +1,239 @@
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from schedule import interval_mask
+
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+class SlotIndex:
+    """Booked-time bitmaps per (doctor, day), one bit per
+    schedule.UNIT_MINUTES covered by an active appointment. Bitmaps are
+    built from ``(starts_at, ends_at)`` rows loaded lazily through
+    ``loader`` and then kept current by book() and invalidate(); a load
+    that races with a write is not stored. ``bulk_loader`` returns
+    ``(doctor_id, starts_at, ends_at)`` rows for many doctor-days at once
+    for booked_many()."""
+
+    def __init__(self, loader, bulk_loader=None, maxsize=100000):
+        self.loader = loader
+        self.bulk_loader = bulk_loader
+        self.maxsize = maxsize
+        self._bitmaps = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _key(self, doctor_id, day):
+        return int(doctor_id), as_date(day)
+
+    def _bitmap_for(self, intervals):
+        bitmap = 0
+        for starts_at, ends_at in intervals:
+            bitmap |= interval_mask(starts_at, ends_at)
+        return bitmap
+
+    def booked(self, doctor_id, day):
+        key = self._key(doctor_id, day)
+        with self._lock:
+            bitmap = self._bitmaps.get(key)
+            if bitmap is not None:
+                self._bitmaps.move_to_end(key)
+                return bitmap
+            generation = self._generation
+        bitmap = self._bitmap_for(self.loader(*key))
+        self._store({key: bitmap}, generation)
+        return bitmap
+
+    def booked_many(self, doctor_ids, days):
+        keys = [self._key(doctor_id, day) for doctor_id in doctor_ids for day in days]
+        bitmaps = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                bitmap = self._bitmaps.get(key)
+                if bitmap is None:
+                    missing.append(key)
+                else:
+                    self._bitmaps.move_to_end(key)
+                    bitmaps[key] = bitmap
+            generation = self._generation
+        if missing:
+            loaded = dict.fromkeys(missing, 0)
+            rows = self.bulk_loader(sorted({key[0] for key in missing}),
+                                    min(key[1] for key in missing), max(key[1] for key in missing))
+            for doctor_id, starts_at, ends_at in rows:
+                key = self._key(doctor_id, starts_at)
+                if key in loaded:
+                    loaded[key] |= interval_mask(starts_at, ends_at)
+            self._store(loaded, generation)
+            bitmaps.update(loaded)
+        return bitmaps
+
+    def _store(self, bitmaps, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._bitmaps.update(bitmaps)
+            for key in bitmaps:
+                self._bitmaps.move_to_end(key)
+            while len(self._bitmaps) > self.maxsize:
+                self._bitmaps.popitem(last=False)
+
+    def book(self, doctor_id, starts_at, ends_at):
+        key = self._key(doctor_id, starts_at)
+        with self._lock:
+            self._generation += 1
+            if key in self._bitmaps:
+                self._bitmaps[key] |= interval_mask(starts_at, ends_at)
+
+    def invalidate(self, doctor_id, day):
+        with self._lock:
+            self._generation += 1
+            self._bitmaps.pop(self._key(doctor_id, day), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._bitmaps.clear()
+
+    def __len__(self):
+        return len(self._bitmaps)
+
+
+# Most doctors have a free slot within a day or two, so scans start with a
+# one-day window and widen for the doctors still without one.
+SCAN_WINDOWS = (1, 6, 23)
+
+
+class NextFreeSlots:
+    """Earliest free slot per doctor on or after a start day, on top of a
+    SlotIndex and the doctors' compiled schedules. Each entry remembers the
+    range it scanned, so it answers any later start inside that range;
+    changed() drops an entry only when a booking or cancellation falls
+    inside it, and forget() drops it when the doctor's schedule changes.
+    earliest() merges doctors through a heap to return the N earliest open
+    slots. ``after`` (minutes since midnight) excludes slots on the start
+    day that begin at or before it, e.g. the ones already past today."""
+
+    def __init__(self, slot_index, schedules, maxsize=100000):
+        self.slot_index = slot_index
+        self.schedules = schedules
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _covers(self, entry, start, end, after):
+        scanned_from, scanned_to, found = entry
+        if start < scanned_from:
+            return False
+        if found and found[0] == start and found[1] <= after:
+            return False
+        return start <= found[0] if found else end <= scanned_to
+
+    def first_free_many(self, doctor_ids, start, end, after=-1):
+        result = {}
+        missing = []
+        with self._lock:
+            for doctor_id in doctor_ids:
+                entry = self._entries.get(doctor_id)
+                if entry is not None and self._covers(entry, start, end, after):
+                    self._entries.move_to_end(doctor_id)
+                    result[doctor_id] = entry[2]
+                else:
+                    missing.append(doctor_id)
+            generation = self._generation
+        scanned = self._scan(missing, start, end, after)
+        self._store(scanned, generation)
+        result.update((doctor_id, entry[2]) for doctor_id, entry in scanned.items())
+        return result
+
+    def _scan(self, doctor_ids, start, end, after=-1):
+        scanned = {}
+        window_start = start
+        windows = iter(SCAN_WINDOWS)
+        while doctor_ids and window_start <= end:
+            length = next(windows, None)
+            window_end = min(end, window_start + timedelta(days=length - 1)) if length else end
+            days = [window_start + timedelta(days=offset) for offset in range((window_end - window_start).days + 1)]
+            bitmaps = self.slot_index.booked_many(doctor_ids, days)
+            schedules = self.schedules.get_many(doctor_ids)
+            still_missing = []
+            for doctor_id in doctor_ids:
+                schedule = schedules[doctor_id]
+                found = next(((day, slot_start) for day in days if (slot_start := schedule.template_for(day).first_free(
+                    bitmaps[(doctor_id, day)], after if day == start else -1)) is not None), None)
+                if found is None:
+                    still_missing.append(doctor_id)
+                else:
+                    scanned[doctor_id] = (start, found[0], found)
+            doctor_ids = still_missing
+            window_start = window_end + timedelta(days=1)
+        for doctor_id in doctor_ids:
+            scanned[doctor_id] = (start, end, None)
+        return scanned
+
+    def _store(self, entries, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries.update(entries)
+            for doctor_id in entries:
+                self._entries.move_to_end(doctor_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _next_after(self, doctor_id, day, slot_start, end):
+        template = self.schedules.get(doctor_id).template_for(day)
+        slot_start = template.first_free(self.slot_index.booked(doctor_id, day), slot_start)
+        if slot_start is not None:
+            return day, slot_start
+        following = day + timedelta(days=1)
+        if following > end:
+            return None
+        return self._scan([doctor_id], following, end)[doctor_id][2]
+
+    def earliest(self, doctor_ids, start, end, limit, after=-1):
+        heap = [(found[0], found[1], doctor_id)
+                for doctor_id, found in self.first_free_many(doctor_ids, start, end, after).items()
+                if found and found[0] <= end]
+        heapq.heapify(heap)
+        slots = []
+        while heap and len(slots) < limit:
+            day, slot_start, doctor_id = heapq.heappop(heap)
+            slots.append((doctor_id, day, self.schedules.get(doctor_id).template_for(day).label_at(slot_start)))
+            following = self._next_after(doctor_id, day, slot_start, end)
+            if following is not None:
+                heapq.heappush(heap, (following[0], following[1], doctor_id))
+        return slots
+
+    def changed(self, doctor_id, day):
+        doctor_id, day = int(doctor_id), as_date(day)
+        with self._lock:
+            self._generation += 1
+            entry = self._entries.get(doctor_id)
+            if entry is not None:
+                scanned_from, scanned_to, found = entry
+                if scanned_from <= day <= (found[0] if found else scanned_to):
+                    del self._entries[doctor_id]
+
+    def forget(self, doctor_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(int(doctor_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,83 @@
+"""Paginated admin tables on 100k appointments, 20k patients and 200
+doctors, with and without the appointment start-time index.
+
+The admin/* and appointments.html templates are not in the tree, so the
+views are called with render_template replaced by a stub that touches
+the rows it is given. The times are view, query and stub only, with no
+template rendering.
+
+    python benchmarks/admin_tables.py
+"""
+from datetime import date, timedelta
+
+from common import appointment_row, best_of, create_schema
+from schedule import DEFAULT_TEMPLATE
+
+doccure = create_schema()
+app, db = doccure.app, doccure.db
+
+DOCTORS, PATIENTS, APPOINTMENTS = 200, 20000, 100000
+STATUSES = ('Confirmed', 'Cancelled', 'Completed')
+URLS = ('/admin/appointments', '/admin/appointments?page=3&per_page=50&sort=-created_at',
+        '/admin/appointments?status=Cancelled', '/admin/appointments?doctor_id=5&from=2020-02-01&to=2020-03-01',
+        '/admin/doctors?name=Doc01&available=true', '/admin/doctors?sort=-rating', '/admin/patients?name=Pat0001',
+        '/admin/patients', '/admin/patients/7/appointments', '/admin/dashboard', '/super-admin/dashboard')
+
+
+def render(template, **context):
+    for rows in context.values():
+        for row in rows if isinstance(rows, list) else ():
+            for relationship in ('doctor', 'patient'):
+                getattr(row, relationship, None)
+    return template
+
+
+def populate():
+    labels = DEFAULT_TEMPLATE.labels
+    with app.app_context():
+        admin = doccure.Admin(full_name='Admin', email='admin@example.com', password_hash='x', role='super_admin',
+                              is_admin=True, is_super_admin=True)
+        db.session.add(admin)
+        db.session.execute(doccure.Doctor.__table__.insert(), [
+            dict(full_name=f'Doc{i:03d}', email=f'doctor{i}@example.com', password_hash='x',
+                 specialization=('Cardiology', 'Dermatology')[i % 2], city='Pune', fees=500, is_available=bool(i % 3))
+            for i in range(DOCTORS)])
+        db.session.execute(doccure.User.__table__.insert(), [
+            dict(full_name=f'Pat{i:05d}', email=f'patient{i}@example.com', password_hash='x', role='patient')
+            for i in range(PATIENTS)])
+        db.session.execute(doccure.Appointment.__table__.insert(), [
+            appointment_row(1 + i % DOCTORS, 1 + i % PATIENTS, date(2020, 1, 1) + timedelta(days=i // 1800),
+                            labels[(i // DOCTORS) % len(labels)], status=STATUSES[i % 3])
+            for i in range(APPOINTMENTS)])
+        db.session.commit()
+        doccure.rebuild_counters()
+        return admin.id
+
+
+def measure(client, label):
+    print(label)
+    for url in URLS:
+        for cache in (doccure.table_count_cache, doccure.principal_cache):
+            cache.clear()
+        with doccure.query_budget.count() as counter:
+            assert client.get(url).status_code == 200, url
+        print(f'  {url:62s} {best_of(lambda: client.get(url), 5):6.1f} ms  {counter.count} queries')
+
+
+def main():
+    doccure.render_template = render
+    admin_id = populate()
+    print(f'{APPOINTMENTS} appointments, {PATIENTS} patients, {DOCTORS} doctors; render_template stubbed')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = f'admin:{admin_id}'
+        session['_fresh'] = True
+    measure(client, 'with ix_appointments_starts_at')
+    with app.app_context():
+        db.session.execute(db.text('DROP INDEX ix_appointments_starts_at'))
+        db.session.commit()
+    measure(client, 'without it')
+
+
+if __name__ == '__main__':
+    main()
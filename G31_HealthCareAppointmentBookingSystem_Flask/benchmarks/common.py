@@ -0,0 +1,69 @@
+"""Shared setup for the benchmark scripts. Import it before ``app``: it
+points the app at a throwaway SQLite database and turns bcrypt down so
+that only the benchmarked path costs anything."""
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def scratch_database():
+    return 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='doccure-bench-'), 'doccure.db')
+
+
+os.environ.setdefault('DATABASE_URL', scratch_database())
+os.environ.setdefault('PASSWORD_POOL_WORKERS', '0')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-of-32-bytes-or-more')
+
+
+def create_schema():
+    import app as doccure
+    with doccure.app.app_context():
+        doccure.db.create_all()
+    return doccure
+
+
+def appointment_row(doctor_id, patient_id, day, time_slot, **values):
+    """Column values for a bulk insert into appointments, which skips the
+    ORM hooks that fill in the slot span."""
+    from schedule import slot_bounds
+    starts_at, ends_at = slot_bounds(day, time_slot)
+    return {
+        'doctor_id': doctor_id, 'patient_id': patient_id, 'appointment_date': day, 'time_slot': time_slot,
+        'starts_at': starts_at, 'ends_at': ends_at, 'illness': 'Recurring headache', 'first_name': 'Pat',
+        'last_name': 'Ient', 'contact': '9876543210', 'age': 34, 'gender': 'female', 'status': 'Confirmed',
+        'created_at': datetime.utcnow(), 'updated_at': datetime.utcnow(), **values,
+    }
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def best_of(func, repeat=7):
+    """Fastest of ``repeat`` runs of ``func()``, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def run_variants(script, variants):
+    """Run ``script`` once per ``(name, environment)`` pair, each in its own
+    process and on its own database, for settings the app reads at import.
+    The child sees its variant name in BENCH_VARIANT."""
+    for name, environment in variants:
+        subprocess.run([sys.executable, script], check=True, env={
+            **os.environ, 'DATABASE_URL': scratch_database(), **environment, 'BENCH_VARIANT': name,
+        })
@@ -0,0 +1,152 @@
+"""Bytes on the wire and latency with identity, gzip and brotli, as the
+Django client sees them on a slow link. The app runs on a threaded
+werkzeug server behind a TCP proxy that limits throughput to BENCH_MBIT
+(default 2) and adds half of BENCH_RTT_MS (default 40) each way; every
+request opens a fresh connection, as APIService does.
+
+    python benchmarks/compression.py
+"""
+import collections
+import os
+import socket
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from common import create_schema
+
+doccure = create_schema()
+app, db = doccure.app, doccure.db
+
+BYTES_PER_SECOND = float(os.environ.get('BENCH_MBIT', 2)) * 1e6 / 8
+ONE_WAY_DELAY = float(os.environ.get('BENCH_RTT_MS', 40)) / 2000
+SEGMENT = 1460
+REPEAT = 8
+wire = collections.Counter()
+
+
+def pump(source, target, direction):
+    """Forward ``source`` to ``target`` one segment at a time, no faster than
+    the link and each segment ONE_WAY_DELAY after it arrived."""
+    segments = collections.deque()
+    ready = threading.Condition()
+    closed = []
+
+    def receive():
+        while True:
+            try:
+                data = source.recv(65536)
+            except OSError:
+                data = b''
+            with ready:
+                if not data:
+                    closed.append(True)
+                    ready.notify()
+                    return
+                arrived = time.perf_counter()
+                segments.extend((arrived, data[i:i + SEGMENT]) for i in range(0, len(data), SEGMENT))
+                ready.notify()
+
+    threading.Thread(target=receive, daemon=True).start()
+    link_free_at = 0.0
+    while True:
+        with ready:
+            while not segments and not closed:
+                ready.wait()
+            if not segments:
+                break
+            arrived, segment = segments.popleft()
+        link_free_at = max(link_free_at, arrived) + len(segment) / BYTES_PER_SECOND
+        wait = link_free_at + ONE_WAY_DELAY - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        wire[direction] += len(segment)
+        try:
+            target.sendall(segment)
+        except OSError:
+            break
+    try:
+        target.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def throttle(listener, upstream_port):
+    while True:
+        client, _ = listener.accept()
+        server = socket.create_connection(('127.0.0.1', upstream_port))
+        for connection in (client, server):
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=pump, args=(client, server, 'up'), daemon=True).start()
+        threading.Thread(target=pump, args=(server, client, 'down'), daemon=True).start()
+
+
+def populate():
+    with app.app_context():
+        admin = doccure.Admin(full_name='Admin', email='admin@example.com', password_hash='x', role='super_admin',
+                              is_admin=True, is_super_admin=True)
+        db.session.add(admin)
+        cities = ('Pune', 'Mumbai', 'Delhi', 'Chennai')
+        specializations = ('Cardiology', 'Dermatology', 'Neurology', 'Orthopedics')
+        db.session.add_all([doccure.Doctor(full_name=f'Dr. Person {i}', email=f'doctor{i}@clinic.example.com',
+                                           password_hash='x', specialization=specializations[i % 4],
+                                           city=cities[i % 4], fees=300 + i, experience=i % 30,
+                                           profile_image=f'doctor{i}.jpg') for i in range(200)])
+        db.session.commit()
+        admin_token = doccure.create_principal_token('admin', admin.id)
+    client = app.test_client()
+    patient_token = client.post('/api/register/', json={'email': 'patient@example.com', 'password': 'secret',
+                                                        'full_name': 'Pat Ient'}).json['access_token']
+    for number in range(100):
+        hour = 9 + number % 8
+        day = date.today() + timedelta(days=1 + number // 8)
+        assert client.post('/api/appointments/', headers={'Authorization': 'Bearer ' + patient_token}, json={
+            'doctor_id': 1 + number % 50, 'appointment_date': day.isoformat(),
+            'time_slot': f'{hour:02d}:00 - {hour + 1:02d}:00', 'illness': 'Recurring headache and fatigue',
+            'first_name': 'Pat', 'last_name': 'Ient', 'contact': '9876543210', 'age': 34, 'gender': 'female',
+        }).status_code == 201
+    doccure.compress_static(app.static_folder, app.config['COMPRESS_STATIC_DIRS'])
+    return {'Authorization': 'Bearer ' + admin_token}, {'Authorization': 'Bearer ' + patient_token}
+
+
+def main():
+    as_admin, as_patient = populate()
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(64)
+    threading.Thread(target=throttle, args=(listener, server.server_port), daemon=True).start()
+    base = f'http://127.0.0.1:{listener.getsockname()[1]}'
+
+    print(f'{BYTES_PER_SECOND * 8 / 1e6:g} Mbit/s, {ONE_WAY_DELAY * 2000:g} ms RTT, fresh connection per request; '
+          f'median response bytes and latency of {REPEAT}')
+    for path, headers in (('/api/doctors/?limit=100', {}), ('/api/appointments/?limit=100', as_patient),
+                          ('/api/changes?limit=1000', as_admin), ('/about', {}), ('/static/css/admin.css', {})):
+        row = []
+        for encoding in ('identity', 'gzip', 'br'):
+            times, sizes = [], []
+            for _ in range(REPEAT):
+                wire.clear()
+                start = time.perf_counter()
+                response = requests.get(base + path, headers={**headers, 'Accept-Encoding': encoding}, timeout=60)
+                assert response.status_code == 200, (path, response.status_code)
+                times.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.05)
+                sizes.append(wire['down'])
+            row.append(f'{encoding} {statistics.median(sizes) / 1024:6.1f} KiB {statistics.median(times):5.0f} ms')
+        print(f'{path:30s} ' + ' | '.join(row))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Statements and time for the appointment tables with the doctor and
+patient of each row joined in (APPOINTMENT_PEOPLE) and lazily loaded.
+
+The admin/* and appointments.html templates are not in the tree, so the
+views are called with render_template replaced by a stub that reads the
+doctor and patient names of every row, as those templates would. The
+times cover the view, its queries and the stub, and no template
+rendering.
+
+    python benchmarks/eager_loads.py
+"""
+from datetime import date, timedelta
+
+from common import appointment_row, best_of, create_schema
+from schedule import DEFAULT_TEMPLATE
+
+doccure = create_schema()
+app, db = doccure.app, doccure.db
+
+DOCTORS, PATIENTS, APPOINTMENTS = 50, 1000, 20000
+URLS = ('/admin/appointments', '/admin/appointments?per_page=100', '/admin/appointments?doctor_id=3',
+        '/admin/statistics')
+
+
+def render(template, **context):
+    for rows in context.values():
+        for row in rows if isinstance(rows, list) else ():
+            if isinstance(row, doccure.Appointment):
+                row.doctor.full_name, row.patient.full_name
+    return template
+
+
+def populate():
+    labels = DEFAULT_TEMPLATE.labels
+    with app.app_context():
+        admin = doccure.Admin(full_name='Admin', email='admin@example.com', password_hash='x', role='super_admin',
+                              is_admin=True, is_super_admin=True)
+        db.session.add(admin)
+        db.session.execute(doccure.Doctor.__table__.insert(), [
+            dict(full_name=f'Doc{i:03d}', email=f'doctor{i}@example.com', password_hash='x', specialization='Cardiology',
+                 fees=500) for i in range(DOCTORS)])
+        db.session.execute(doccure.User.__table__.insert(), [
+            dict(full_name=f'Pat{i:05d}', email=f'patient{i}@example.com', password_hash='x', role='patient')
+            for i in range(PATIENTS)])
+        db.session.execute(doccure.Appointment.__table__.insert(), [
+            appointment_row(1 + i % DOCTORS, 1 + (i * 7) % PATIENTS, date(2020, 1, 1) + timedelta(days=i // 450),
+                            labels[(i // DOCTORS) % len(labels)]) for i in range(APPOINTMENTS)])
+        db.session.commit()
+        doccure.rebuild_counters()
+        return admin.id
+
+
+def measure(client, label):
+    print(label)
+    for url in URLS:
+        doccure.table_count_cache.clear()
+        client.get(url)
+        with doccure.query_budget.count() as counter:
+            assert client.get(url).status_code == 200, url
+        print(f'  {url:36s} {counter.count:3d} statements  {best_of(lambda: client.get(url), 5):6.1f} ms')
+
+
+def main():
+    doccure.render_template = render
+    admin_id = populate()
+    print(f'{APPOINTMENTS} appointments, {PATIENTS} patients, {DOCTORS} doctors; render_template stubbed')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = f'admin:{admin_id}'
+        session['_fresh'] = True
+    measure(client, 'joined (APPOINTMENT_PEOPLE)')
+    doccure.APPOINTMENT_PEOPLE = ()
+    measure(client, 'lazy')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Email lookups for login and registration: probing the Admin, Doctor and
+User tables in turn (the old path) against one identities lookup, plus
+the statements and latency of POST /api/login/ and a duplicate
+registration.
+
+    python benchmarks/identity_lookup.py
+"""
+import time
+
+from common import create_schema, percentile
+
+doccure = create_schema()
+app, db = doccure.app, doccure.db
+
+ADMINS, DOCTORS, PATIENTS = 10, 2000, 20000
+LOOKUPS = 2000
+
+
+def probe_tables(email):
+    for model in (doccure.Admin, doccure.Doctor, doccure.User):
+        principal = model.query.filter_by(email=email).first()
+        if principal:
+            return principal
+
+
+def directory_lookup(email):
+    identity = doccure.Identity.query.filter_by(email=email).first()
+    if identity:
+        return db.session.get(doccure.PRINCIPAL_MODELS[identity.principal_type], identity.principal_id)
+
+
+def measure(lookup, emails):
+    times = []
+    with doccure.query_budget.count() as counter:
+        for email in emails:
+            start = time.perf_counter()
+            assert lookup(email) is not None
+            times.append((time.perf_counter() - start) * 1000)
+            db.session.expunge_all()
+    return counter.count / len(emails), percentile(times, 0.5), percentile(times, 0.95)
+
+
+def main():
+    with app.app_context():
+        for model, rows in ((doccure.Admin, [dict(full_name=f'Admin {i}', email=f'admin{i}@example.com', password_hash='x',
+                                                   role='admin') for i in range(ADMINS)]),
+                            (doccure.Doctor, [dict(full_name=f'Dr. {i}', email=f'doctor{i}@example.com', password_hash='x',
+                                                   specialization='Cardiology', fees=500) for i in range(DOCTORS)]),
+                            (doccure.User, [dict(full_name=f'Patient {i}', email=f'patient{i}@example.com',
+                                                 password_hash='x', role='patient') for i in range(PATIENTS)])):
+            db.session.execute(model.__table__.insert(), rows)
+        db.session.commit()
+        doccure.sync_identity_directory()
+
+        # Patients are found in the last table probed, as most logins are.
+        emails = [f'patient{i * (PATIENTS // LOOKUPS)}@example.com' for i in range(LOOKUPS)]
+        print(f'{LOOKUPS} patient lookups among {ADMINS + DOCTORS + PATIENTS} principals')
+        for name, lookup in (('admin/doctor/user probe', probe_tables), ('identity directory', directory_lookup)):
+            queries, median, p95 = measure(lookup, emails)
+            print(f'  {name:24s} {queries:.0f} queries  median {median:.3f} ms  p95 {p95:.3f} ms')
+
+    client = app.test_client()
+    assert client.post('/api/register/', json={'email': 'new@example.com', 'password': 'secret',
+                                               'full_name': 'New Patient'}).status_code == 201
+    for name, send in (
+            ('POST /api/login/', lambda: client.post('/api/login/', json={'email': 'new@example.com',
+                                                                          'password': 'secret'})),
+            ('duplicate POST /api/register/', lambda: client.post('/api/register/', json={
+                'email': 'new@example.com', 'password': 'secret', 'full_name': 'New Patient'}))):
+        times, counts = [], []
+        for _ in range(200):
+            doccure.principal_cache.clear()
+            with doccure.query_budget.count() as counter:
+                start = time.perf_counter()
+                status = send().status_code
+                times.append((time.perf_counter() - start) * 1000)
+            counts.append(counter.count)
+        print(f'{name} ({status}): {max(counts)} statements  p95 {percentile(times, 0.95):.2f} ms '
+              f'(bcrypt cost {app.config["BCRYPT_LOG_ROUNDS"]})')
+        for statement in counter.statements:
+            print('    ' + ' '.join(statement.split())[:110])
+
+
+if __name__ == '__main__':
+    main()
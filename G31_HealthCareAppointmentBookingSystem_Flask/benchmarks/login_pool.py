@@ -0,0 +1,64 @@
+"""Mixed traffic: 8 threads logging in 5 times each while 2 threads poll
+GET /api/doctors/, with bcrypt hashing inline (PASSWORD_POOL_WORKERS=0)
+and on the process pool.
+
+    python benchmarks/login_pool.py
+"""
+import os
+import threading
+import time
+
+from common import create_schema, percentile, run_variants
+
+LOGIN_THREADS, LOGINS, READ_THREADS = 8, 5, 2
+ROUNDS = os.environ.get('BENCH_BCRYPT_LOG_ROUNDS', '12')
+
+
+def main():
+    doccure = create_schema()
+    app = doccure.app
+    client = app.test_client()
+    assert client.post('/api/register/', json={'email': 'patient@example.com', 'password': 'secret',
+                                               'full_name': 'Patient'}).status_code == 201
+    reads, logins = [], []
+    stop = threading.Event()
+
+    def read():
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/api/doctors/')
+            reads.append((time.perf_counter() - start) * 1000)
+
+    def log_in():
+        client = app.test_client()
+        for _ in range(LOGINS):
+            start = time.perf_counter()
+            status = client.post('/api/login/', json={'email': 'patient@example.com', 'password': 'secret'}).status_code
+            logins.append((status, (time.perf_counter() - start) * 1000))
+
+    readers = [threading.Thread(target=read) for _ in range(READ_THREADS)]
+    loggers = [threading.Thread(target=log_in) for _ in range(LOGIN_THREADS)]
+    start = time.perf_counter()
+    for thread in readers + loggers:
+        thread.start()
+    for thread in loggers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    doccure.password_hasher.shutdown()
+    statuses = sorted({status for status, _ in logins})
+    print(f'{os.environ["BENCH_VARIANT"]:7s} {elapsed:5.1f} s  {len(reads):5d} reads  read p95 '
+          f'{percentile(reads, 0.95):6.1f} ms  login p95 {percentile([ms for _, ms in logins], 0.95):7.1f} ms  '
+          f'login statuses {statuses}')
+
+
+if __name__ == '__main__':
+    if 'BENCH_VARIANT' in os.environ:
+        main()
+    else:
+        print(f'{LOGIN_THREADS} threads x {LOGINS} logins, {READ_THREADS} threads reading, bcrypt cost {ROUNDS}')
+        run_variants(__file__, [('inline', {'PASSWORD_POOL_WORKERS': '0', 'BCRYPT_LOG_ROUNDS': ROUNDS}),
+                                ('pool', {'PASSWORD_POOL_WORKERS': '2', 'BCRYPT_LOG_ROUNDS': ROUNDS})])
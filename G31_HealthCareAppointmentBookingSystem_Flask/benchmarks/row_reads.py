@@ -0,0 +1,87 @@
+"""Reading appointments as ORM entities + to_dict() against column rows +
+a compiled row serializer, for all 50k rows of one patient and for a
+200-row page, with time and peak memory. Also times GET
+/api/appointments/ for that patient.
+
+    python benchmarks/row_reads.py
+"""
+import gc
+import tracemalloc
+from datetime import date, timedelta
+
+from common import appointment_row, best_of, create_schema
+from schedule import DEFAULT_TEMPLATE
+
+doccure = create_schema()
+app, db = doccure.app, doccure.db
+Appointment = doccure.Appointment
+
+APPOINTMENTS, DOCTORS, PAGE = 50000, 6, 200
+PAGE_FIELDS = ('id', 'appointment_date', 'time_slot', 'status')
+
+
+def peak_memory(func):
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def entities(query, fields=doccure.APPOINTMENT_FIELDS):
+    def read():
+        rows = [appointment.to_dict() for appointment in query.all()]
+        if fields != doccure.APPOINTMENT_FIELDS:
+            rows = [{field: row[field] for field in fields} for row in rows]
+        db.session.remove()
+        return rows
+    return read
+
+
+def row_tuples(query, fields=doccure.APPOINTMENT_FIELDS):
+    def read():
+        serialize = doccure.row_serializer_for(Appointment, fields)
+        rows = [serialize(row) for row in doccure.select_fields(query, Appointment, fields).all()]
+        db.session.remove()
+        return rows
+    return read
+
+
+def main():
+    labels = DEFAULT_TEMPLATE.labels
+    with app.app_context():
+        db.session.execute(doccure.User.__table__.insert(), [dict(full_name='Patient', email='patient@example.com',
+                                                                  password_hash='x', role='patient')])
+        db.session.execute(doccure.Doctor.__table__.insert(), [
+            dict(full_name=f'Dr. {i}', email=f'doctor{i}@example.com', password_hash='x', specialization='Cardiology',
+                 fees=500) for i in range(DOCTORS)])
+        per_day = DOCTORS * len(labels)
+        db.session.execute(Appointment.__table__.insert(), [
+            appointment_row(1 + number % DOCTORS, 1, date(2000, 1, 1) + timedelta(days=number // per_day),
+                            labels[(number // DOCTORS) % len(labels)]) for number in range(APPOINTMENTS)])
+        db.session.commit()
+
+        everything = Appointment.query.filter_by(patient_id=1)
+        page = everything.order_by(Appointment.starts_at.desc(), Appointment.id.desc()).limit(PAGE + 1)
+        assert entities(page)() == row_tuples(page)()
+        for name, query, fields in ((f'all {APPOINTMENTS} rows', everything, doccure.APPOINTMENT_FIELDS),
+                                    (f'{PAGE}-row page', page, doccure.APPOINTMENT_FIELDS),
+                                    (f'{PAGE}-row page, fields={",".join(PAGE_FIELDS)}', page, PAGE_FIELDS)):
+            print(name)
+            for label, read in (('entities + to_dict', entities(query, fields)),
+                                ('row tuples + serializer', row_tuples(query, fields))):
+                print(f'  {label:24s} {best_of(read, 5):7.1f} ms  peak {peak_memory(read):6.2f} MB')
+
+    client = app.test_client()
+    with app.app_context():
+        headers = {'Authorization': 'Bearer ' + doccure.create_principal_token('user', 1)}
+    for query in (f'limit={PAGE}', f'limit={PAGE}&fields={",".join(PAGE_FIELDS)}'):
+        url = f'/api/appointments/?{query}'
+        assert client.get(url, headers=headers).status_code == 200
+        print(f'GET {url}: {best_of(lambda: client.get(url, headers=headers), 20):.2f} ms  '
+              f'peak {peak_memory(lambda: client.get(url, headers=headers)):.2f} MB')
+
+
+if __name__ == '__main__':
+    main()
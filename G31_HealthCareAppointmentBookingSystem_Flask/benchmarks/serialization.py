@@ -0,0 +1,74 @@
+"""Serializing 10k appointments: the hand-written to_dict() and
+flask_restful's JSON encoding the app used to have, against the compiled
+serializers with the orjson and standard-library backends.
+
+    python benchmarks/serialization.py
+"""
+import os
+from datetime import date, timedelta
+
+from flask_restful.representations.json import output_json as restful_output_json
+
+from common import appointment_row, best_of, create_schema, run_variants
+from schedule import DEFAULT_TEMPLATE
+
+APPOINTMENTS = 10000
+
+
+def legacy_to_dict(self):
+    """Appointment.to_dict() as it was written before serialization.py,
+    plus the slot span columns added since."""
+    return {
+        'id': self.id,
+        'service_id': self.service_id,
+        'doctor_id': self.doctor_id,
+        'patient_id': self.patient_id,
+        'appointment_date': self.appointment_date.strftime('%Y-%m-%d'),
+        'time_slot': self.time_slot,
+        'starts_at': self.starts_at.isoformat(),
+        'ends_at': self.ends_at.isoformat(),
+        'illness': self.illness,
+        'status': self.status,
+        'first_name': self.first_name,
+        'last_name': self.last_name,
+        'contact': self.contact,
+        'age': self.age,
+        'gender': self.gender,
+        'created_at': self.created_at.isoformat() if self.created_at else None,
+        'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        'notes': self.notes,
+        'prescription': self.prescription,
+        'follow_up_date': self.follow_up_date.strftime('%Y-%m-%d') if self.follow_up_date else None
+    }
+
+
+def main():
+    doccure = create_schema()
+    app, db = doccure.app, doccure.db
+    variant = os.environ['BENCH_VARIANT']
+    labels = DEFAULT_TEMPLATE.labels
+    with app.app_context():
+        db.session.execute(doccure.Appointment.__table__.insert(), [
+            appointment_row(1, 1, date(2020, 1, 1) + timedelta(days=number // len(labels)), labels[number % len(labels)],
+                            notes='Bring reports' if number % 2 else None,
+                            follow_up_date=date(2021, 1, 1) if number % 3 == 0 else None)
+            for number in range(APPOINTMENTS)])
+        db.session.commit()
+        appointments = doccure.Appointment.query.all()
+        to_dict = legacy_to_dict if variant == 'before' else doccure.Appointment.to_dict
+        encode = restful_output_json if variant == 'before' else doccure.output_json
+        assert legacy_to_dict(appointments[0]) == doccure.Appointment.to_dict(appointments[0])
+        with app.test_request_context():
+            payload = {'status': 'success', 'appointments': [to_dict(appointment) for appointment in appointments]}
+            dict_ms = best_of(lambda: [to_dict(appointment) for appointment in appointments])
+            encode_ms = best_of(lambda: encode(payload, 200))
+    print(f'{variant:7s} to_dict {dict_ms:5.0f} ms + encode {encode_ms:4.0f} ms = {dict_ms + encode_ms:5.0f} ms')
+
+
+if __name__ == '__main__':
+    if 'BENCH_VARIANT' in os.environ:
+        main()
+    else:
+        print(f'{APPOINTMENTS} appointments, best of 7')
+        run_variants(__file__, [('before', {}), ('orjson', {'JSON_BACKEND': 'orjson'}),
+                                ('json', {'JSON_BACKEND': 'json'})])
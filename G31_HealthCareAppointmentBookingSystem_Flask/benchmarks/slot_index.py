@@ -0,0 +1,69 @@
+"""GET /api/doctors/<id>/slots on cold and warm slot bitmaps, for 1k
+doctors x 90 days with up to 200k appointments.
+
+    python benchmarks/slot_index.py
+"""
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from common import appointment_row, create_schema
+from schedule import DEFAULT_TEMPLATE
+
+doccure = create_schema()
+app, db = doccure.app, doccure.db
+
+DOCTORS, DAYS, APPOINTMENTS = 1000, 90, 200000
+FIRST_DAY = date.today() + timedelta(days=1)
+
+
+def main():
+    random.seed(1)
+    with app.app_context():
+        db.session.execute(doccure.User.__table__.insert(), [dict(full_name='Patient', email='patient@example.com',
+                                                                  password_hash='x', role='patient')])
+        db.session.execute(doccure.Doctor.__table__.insert(), [
+            dict(full_name=f'Dr. {i}', email=f'doctor{i}@example.com', password_hash='x', specialization='Cardiology',
+                 fees=500) for i in range(DOCTORS)])
+        rows = {}
+        for _ in range(APPOINTMENTS):
+            key = (random.randint(1, DOCTORS), FIRST_DAY + timedelta(days=random.randrange(DAYS)),
+                   random.choice(DEFAULT_TEMPLATE.labels))
+            rows[key] = appointment_row(key[0], 1, key[1], key[2])
+        db.session.execute(doccure.Appointment.__table__.insert(), list(rows.values()))
+        db.session.commit()
+    print(f'{DOCTORS} doctors x {DAYS} days, {len(rows)} appointments')
+
+    client = app.test_client()
+    urls = [f'/api/doctors/{doctor_id}/slots?date={FIRST_DAY + timedelta(days=offset)}'
+            for doctor_id in range(1, DOCTORS + 1, 5) for offset in range(0, DAYS, 3)]
+    doccure.slot_index.clear()
+    doccure.schedule_cache.clear()
+    for name in ('cold', 'warm'):
+        with doccure.query_budget.count() as counter:
+            start = time.perf_counter()
+            for url in urls:
+                assert client.get(url).status_code == 200
+            elapsed = time.perf_counter() - start
+        print(f'  {name}: {len(urls)} requests  {elapsed * 1000 / len(urls):.2f} ms/request  '
+              f'{counter.count / len(urls):.2f} queries/request')
+
+    with app.app_context():
+        doccure.slot_index.clear()
+        days = [FIRST_DAY + timedelta(days=offset) for offset in range(DAYS)]
+        tracemalloc.start()
+        for first in range(1, DOCTORS + 1, 100):
+            doccure.slot_index.booked_many(range(first, first + 100), days)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    print(f'  all {len(doccure.slot_index)} doctor-days warm: {size / 2**20:.1f} MB')
+    lookups = 100000
+    start = time.perf_counter()
+    for number in range(lookups):
+        doccure.slot_index.booked(1 + number % DOCTORS, days[number % DAYS])
+    print(f'  direct lookup: {(time.perf_counter() - start) * 1e6 / lookups:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Mixed read/write load: 16 threads make 720 bookings for 45 slots (16
+per slot) while 4 threads read slot lists, with the write queue on and
+with SQLITE_WRITE_QUEUE=false.
+
+    python benchmarks/write_queue.py
+"""
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from common import create_schema, percentile, run_variants
+from schedule import DEFAULT_TEMPLATE
+
+WRITERS, READERS = 16, 4
+DOCTORS, ATTEMPTS_PER_SLOT = 5, 16
+DAY = date.today() + timedelta(days=1)
+
+
+def main():
+    doccure = create_schema()
+    app, db = doccure.app, doccure.db
+    with app.app_context():
+        db.session.add_all([doccure.Doctor(full_name=f'Dr. {i}', email=f'doctor{i}@example.com', password_hash='x',
+                                           specialization='Cardiology', fees=500) for i in range(DOCTORS)])
+        db.session.add_all([doccure.User(full_name=f'Patient {i}', email=f'patient{i}@example.com', password_hash='x',
+                                         role='patient') for i in range(WRITERS)])
+        db.session.commit()
+        tokens = [doccure.create_principal_token('user', patient_id) for patient_id in range(1, WRITERS + 1)]
+    bookings = [(doctor_id, label) for doctor_id in range(1, DOCTORS + 1)
+                for label in DEFAULT_TEMPLATE.labels] * ATTEMPTS_PER_SLOT
+    random.Random(1).shuffle(bookings)
+    statuses, reads = Counter(), []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def book(token):
+        client = app.test_client()
+        headers = {'Authorization': 'Bearer ' + token}
+        while True:
+            with lock:
+                if not bookings:
+                    return
+                doctor_id, label = bookings.pop()
+            status = client.post('/api/appointments/', headers=headers, json={
+                'doctor_id': doctor_id, 'appointment_date': DAY.isoformat(), 'time_slot': label,
+                'illness': 'Checkup', 'first_name': 'Pat', 'last_name': 'Ient', 'contact': '9876543210',
+                'age': 40, 'gender': 'female'}).status_code
+            with lock:
+                statuses[status] += 1
+
+    def read(number):
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get(f'/api/doctors/{1 + number % DOCTORS}/slots?date={DAY}')
+            reads.append((time.perf_counter() - start) * 1000)
+
+    writers = [threading.Thread(target=book, args=(token,)) for token in tokens]
+    readers = [threading.Thread(target=read, args=(number,)) for number in range(READERS)]
+    start = time.perf_counter()
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    with app.app_context():
+        per_slot = Counter(db.session.query(doccure.Appointment.doctor_id, doccure.Appointment.time_slot)
+                           .filter(doccure.Appointment.status != 'Cancelled'))
+    print(f'{os.environ["BENCH_VARIANT"]:9s} bookings {dict(sorted(statuses.items()))}  '
+          f'{sum(statuses.values()) / elapsed:4.0f} bookings/s  {len(reads) / elapsed:5.0f} reads/s  '
+          f'read p95 {percentile(reads, 0.95):5.1f} ms  max per slot {max(per_slot.values())}')
+
+
+if __name__ == '__main__':
+    if 'BENCH_VARIANT' in os.environ:
+        main()
+    else:
+        slots = DOCTORS * len(DEFAULT_TEMPLATE.labels)
+        print(f'{WRITERS} booking threads, {slots * ATTEMPTS_PER_SLOT} bookings for {slots} slots, '
+              f'{READERS} reading threads')
+        run_variants(__file__, [('queue', {'SQLITE_WRITE_QUEUE': 'true'}), ('no queue', {'SQLITE_WRITE_QUEUE': 'false'})])
@@ -0,0 +1,176 @@
+import gzip
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+from cache import TTLCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+STATIC_EXTENSIONS = ('.css', '.js')
+
+
+def gzip_compress(data, level):
+    # mtime=0 keeps the output stable for identical input.
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def encodings_available():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress_static(root, directories, gzip_level=9, brotli_quality=11):
+    """Write ``.gz`` (and, with brotli installed, ``.br``) siblings for the
+    CSS and JS files under ``directories`` of ``root``. Up-to-date variants
+    are left alone and variants that would not be smaller are removed.
+    Returns ``(path, size, {encoding: size})`` for each file written."""
+    results = []
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+            for filename in sorted(filenames):
+                if not filename.endswith(STATIC_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                mtime = os.path.getmtime(path)
+                data = None
+                written = {}
+                for encoding in encodings_available():
+                    variant = path + SUFFIXES[encoding]
+                    if os.path.exists(variant) and os.path.getmtime(variant) >= mtime:
+                        continue
+                    if data is None:
+                        with open(path, 'rb') as source:
+                            data = source.read()
+                    if encoding == 'br':
+                        compressed = brotli.compress(data, quality=brotli_quality)
+                    else:
+                        compressed = gzip_compress(data, gzip_level)
+                    if len(compressed) >= len(data):
+                        if os.path.exists(variant):
+                            os.remove(variant)
+                        continue
+                    with open(variant, 'wb') as target:
+                        target.write(compressed)
+                    written[encoding] = len(compressed)
+                if written:
+                    results.append((path, len(data), written))
+    return results
+
+
+class Compression:
+    """Negotiated response compression. Responses with a compressible
+    mimetype and a body of at least COMPRESS_MIN_SIZE bytes are sent with
+    brotli or gzip, whichever the client's Accept-Encoding ranks highest
+    (brotli wins ties, and is only offered when the module is installed).
+    Strong ETags become weak, so conditional requests still get 304s, and
+    the compressed body is cached by ETag so cached JSON responses are not
+    compressed again on every hit. Static files are served from their
+    precompressed ``.br``/``.gz`` siblings (see compress_static()) when
+    those are at least as new as the original."""
+
+    def __init__(self, app=None):
+        self.cache = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.setdefault('COMPRESS_ENABLED', True)
+        self.min_size = app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        self.gzip_level = app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+        self.brotli_quality = app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        self.mimetypes = frozenset(app.config.setdefault('COMPRESS_MIMETYPES', (
+            'application/json', 'text/html', 'text/css', 'text/javascript', 'application/javascript',
+            'text/plain', 'image/svg+xml',
+        )))
+        app.config.setdefault('COMPRESS_STATIC_DIRS', ('css', 'js'))
+        self.cache = TTLCache(app.config.setdefault('COMPRESS_CACHE_SIZE', 256),
+                              app.config.setdefault('COMPRESS_CACHE_TTL', 300))
+        self.encodings = encodings_available()
+        app.after_request(self._compress)
+        if app.has_static_folder and 'static' in app.view_functions:
+            app.view_functions['static'] = self._static_view(app, app.view_functions['static'])
+
+    def negotiate(self):
+        return request.accept_encodings.best_match(self.encodings)
+
+    def _compress_body(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip_compress(data, self.gzip_level)
+
+    def _compress(self, response):
+        if self.enabled and response.status_code == 304 and response.mimetype in self.mimetypes:
+            self._not_modified(response)
+            return response
+        if (not self.enabled or response.direct_passthrough or response.is_streamed
+                or not 200 <= response.status_code < 300 or response.status_code == 204
+                or response.mimetype not in self.mimetypes or 'Content-Encoding' in response.headers
+                or response.cache_control.no_transform):
+            return response
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag and not weak else None
+        compressed = self.cache.get(key) if key else None
+        if compressed is None:
+            compressed = self._compress_body(data, encoding)
+            if key:
+                self.cache.set(key, compressed)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _not_modified(self, response):
+        # A 304 carries the validator of the body the client would have
+        # received, which was compressed if it was large enough.
+        response.vary.add('Accept-Encoding')
+        etag, weak = response.get_etag()
+        if (etag and not weak and not response.direct_passthrough and (response.content_length or 0) >= self.min_size
+                and 'Content-Encoding' not in response.headers and self.negotiate()):
+            response.set_etag(etag, weak=True)
+
+    def _static_encoding(self, app, filename):
+        source = safe_join(app.static_folder, filename)
+        try:
+            modified = os.path.getmtime(source)
+        except (OSError, TypeError):
+            return None
+        fresh = []
+        for encoding in self.encodings:
+            try:
+                if os.path.getmtime(source + SUFFIXES[encoding]) >= modified:
+                    fresh.append(encoding)
+            except OSError:
+                continue
+        return request.accept_encodings.best_match(fresh) if fresh else None
+
+    def _static_view(self, app, view):
+        def send_static(filename):
+            mimetype = mimetypes.guess_type(filename)[0]
+            compressible = self.enabled and mimetype in self.mimetypes
+            encoding = self._static_encoding(app, filename) if compressible else None
+            if encoding:
+                response = send_from_directory(app.static_folder, filename + SUFFIXES[encoding], mimetype=mimetype,
+                                               max_age=app.get_send_file_max_age(filename))
+                response.headers['Content-Encoding'] = encoding
+            else:
+                response = view(filename=filename)
+            if compressible:
+                response.vary.add('Accept-Encoding')
+            return response
+        return send_static
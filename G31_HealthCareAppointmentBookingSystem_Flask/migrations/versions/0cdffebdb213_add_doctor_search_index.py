@@ -0,0 +1,49 @@
+"""add doctor search index
+
+Revision ID: 0cdffebdb213
+Revises: 938d0a08c98f
+Create Date: 2026-10-18 07:58:12.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0cdffebdb213'
+down_revision = '938d0a08c98f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE doctors_fts USING fts5(full_name, specialization, city, content='doctors', "
+        "content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER doctors_fts_ai AFTER INSERT ON doctors BEGIN "
+        "INSERT INTO doctors_fts(rowid, full_name, specialization, city) "
+        "VALUES (new.id, new.full_name, new.specialization, new.city); END"
+    )
+    op.execute(
+        "CREATE TRIGGER doctors_fts_ad AFTER DELETE ON doctors BEGIN "
+        "INSERT INTO doctors_fts(doctors_fts, rowid, full_name, specialization, city) "
+        "VALUES ('delete', old.id, old.full_name, old.specialization, old.city); END"
+    )
+    op.execute(
+        "CREATE TRIGGER doctors_fts_au AFTER UPDATE OF full_name, specialization, city ON doctors BEGIN "
+        "INSERT INTO doctors_fts(doctors_fts, rowid, full_name, specialization, city) "
+        "VALUES ('delete', old.id, old.full_name, old.specialization, old.city); "
+        "INSERT INTO doctors_fts(rowid, full_name, specialization, city) "
+        "VALUES (new.id, new.full_name, new.specialization, new.city); END"
+    )
+    op.execute("INSERT INTO doctors_fts(doctors_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO doctors_fts(doctors_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS doctors_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS doctors_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS doctors_fts_ai")
+    op.execute("DROP TABLE IF EXISTS doctors_fts")
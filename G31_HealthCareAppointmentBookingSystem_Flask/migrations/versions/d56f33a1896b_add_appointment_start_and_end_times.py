@@ -0,0 +1,85 @@
+"""add appointment start and end times
+
+Revision ID: d56f33a1896b
+Revises: 00bbbe069a1a
+Create Date: 2026-10-18 07:55:25.810476
+
+"""
+import re
+from datetime import datetime, time, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd56f33a1896b'
+down_revision = '00bbbe069a1a'
+branch_labels = None
+depends_on = None
+
+SLOT_LABEL = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$')
+
+appointments = sa.table(
+    'appointments',
+    sa.column('id', sa.Integer),
+    sa.column('appointment_date', sa.Date),
+    sa.column('time_slot', sa.String),
+    sa.column('starts_at', sa.DateTime),
+    sa.column('ends_at', sa.DateTime),
+)
+
+
+def slot_bounds(day, label):
+    # Same rule as schedule.slot_bounds: labels that do not parse get a
+    # zero-length span at midnight of their date.
+    day_start = datetime.combine(day, time.min)
+    match = SLOT_LABEL.match(label or '')
+    if match:
+        start_hour, start_minute, end_hour, end_minute = (int(part) for part in match.groups())
+        start, end = start_hour * 60 + start_minute, end_hour * 60 + end_minute
+        if start_minute < 60 and end_minute < 60 and 0 <= start < end <= 24 * 60:
+            return day_start + timedelta(minutes=start), day_start + timedelta(minutes=end)
+    return day_start, day_start
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('starts_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('ends_at', sa.DateTime(), nullable=True))
+
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(appointments.c.id, appointments.c.appointment_date,
+                                        appointments.c.time_slot)).all()
+    update = appointments.update().where(appointments.c.id == sa.bindparam('row_id')) \
+        .values(starts_at=sa.bindparam('starts_at'), ends_at=sa.bindparam('ends_at'))
+    for offset in range(0, len(rows), 10000):
+        connection.execute(update, [
+            dict(zip(('row_id', 'starts_at', 'ends_at'), (row.id, *slot_bounds(row.appointment_date, row.time_slot))))
+            for row in rows[offset:offset + 10000]
+        ])
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.alter_column('starts_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.alter_column('ends_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.drop_index(batch_op.f('ix_appointments_appointment_date'))
+        batch_op.drop_index(batch_op.f('ix_appointments_doctor_id_appointment_date'))
+        batch_op.drop_index(batch_op.f('ix_appointments_patient_id_appointment_date'))
+        batch_op.create_index('ix_appointments_doctor_id_starts_at', ['doctor_id', 'starts_at'], unique=False)
+        batch_op.create_index('ix_appointments_patient_id_starts_at', ['patient_id', 'starts_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_appointments_starts_at'), ['starts_at'], unique=False)
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_appointments_starts_at'))
+        batch_op.drop_index('ix_appointments_patient_id_starts_at')
+        batch_op.drop_index('ix_appointments_doctor_id_starts_at')
+        batch_op.create_index(batch_op.f('ix_appointments_patient_id_appointment_date'), ['patient_id', 'appointment_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_appointments_doctor_id_appointment_date'), ['doctor_id', 'appointment_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_appointments_appointment_date'), ['appointment_date'], unique=False)
+        batch_op.drop_column('ends_at')
+        batch_op.drop_column('starts_at')
+
+    # ### end Alembic commands ###
@@ -0,0 +1,37 @@
+"""add doctor sort indexes
+
+Revision ID: e022c335c7d6
+Revises: 8548a247e203
+Create Date: 2026-10-18 09:12:40.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e022c335c7d6'
+down_revision = '8548a247e203'
+branch_labels = None
+depends_on = None
+
+# Expression indexes for the rating and experience sorts of /api/doctors/;
+# autogenerate cannot see them, so they are listed by hand.
+SORT_INDEXES = (
+    ('ix_doctors_rating_id', (), 'coalesce(rating, 0.0)'),
+    ('ix_doctors_experience_id', (), 'coalesce(experience, 0)'),
+    ('ix_doctors_specialization_rating_id', ('specialization',), 'coalesce(rating, 0.0)'),
+    ('ix_doctors_specialization_experience_id', ('specialization',), 'coalesce(experience, 0)'),
+    ('ix_doctors_city_rating_id', ('city',), 'coalesce(rating, 0.0)'),
+    ('ix_doctors_city_experience_id', ('city',), 'coalesce(experience, 0)'),
+)
+
+
+def upgrade():
+    for name, prefix, expression in SORT_INDEXES:
+        op.create_index(name, 'doctors', [*prefix, sa.text(expression), 'id'], unique=False)
+
+
+def downgrade():
+    for name, _, _ in reversed(SORT_INDEXES):
+        op.drop_index(name, table_name='doctors')
@@ -0,0 +1,116 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import bcrypt
+from blinker import Namespace
+
+signals = Namespace()
+password_timed = signals.signal('password-timed')
+password_rejected = signals.signal('password-rejected')
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _check_password(password_hash, password):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a bounded process pool so
+    that CPU-heavy logins do not hold request threads. Once ``max_pending``
+    operations are queued, new ones fail fast with PasswordHasherBusy.
+    With ``workers`` set to 0 everything runs inline on the caller.
+    ``password_timed`` is sent with the operation name and the seconds the
+    caller spent on it, pool wait included; ``password_rejected`` when an
+    operation is turned away as busy."""
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 2
+        self.max_pending = 32
+        self.timeout = 10
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.setdefault('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.workers = app.config.setdefault('PASSWORD_POOL_WORKERS', self.workers)
+        self.max_pending = app.config.setdefault('PASSWORD_POOL_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.setdefault('PASSWORD_POOL_TIMEOUT', self.timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def _run(self, func, *args):
+        started = time.perf_counter()
+        try:
+            result = self._submit(func, *args)
+        except PasswordHasherBusy:
+            password_rejected.send(self)
+            raise
+        password_timed.send(self, operation=func.__name__.strip('_'), seconds=time.perf_counter() - started)
+        return result
+
+    def _submit(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Password hashing queue is full')
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy('Password hashing timed out')
+
+    def generate_password_hash(self, password):
+        if not password:
+            raise ValueError('Password must be non-empty.')
+        return self._run(_hash_password, password, self.rounds)
+
+    def check_password_hash(self, password_hash, password):
+        if not password_hash or not password:
+            return False
+        if isinstance(password_hash, bytes):
+            password_hash = password_hash.decode('utf-8')
+        return self._run(_check_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        if isinstance(password_hash, bytes):
+            password_hash = password_hash.decode('utf-8')
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,84 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+        self.parameters = []
+
+
+class QueryBudget:
+    """Counts the SQL statements each request runs and compares them with
+    the budget its view declared through ``limit()``. Overruns are logged,
+    or raised as QueryBudgetExceeded when QUERY_BUDGET_STRICT is set or the
+    app is in testing mode. ``count()`` counts statements in a block, for
+    tests and benchmarks."""
+
+    def __init__(self, app=None, db=None):
+        self.strict = False
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.strict = app.config.setdefault('QUERY_BUDGET_STRICT', self.strict)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._record)
+        app.before_request(self._reset)
+        app.after_request(self._check)
+
+    def _reset(self):
+        g.query_count = 0
+        g.pop('query_budget', None)
+
+    def _record(self, connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            return
+        for counter in getattr(self._local, 'counters', ()):
+            counter.count += 1
+            counter.statements.append(statement)
+            counter.parameters.append(parameters)
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+
+    def limit(self, budget):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                g.query_budget = budget
+                return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def count(self):
+        counter = QueryCounter()
+        counters = self._local.__dict__.setdefault('counters', [])
+        counters.append(counter)
+        try:
+            yield counter
+        finally:
+            counters.remove(counter)
+
+    def _check(self, response):
+        budget = g.get('query_budget')
+        used = g.get('query_count', 0)
+        if budget is not None and used > budget:
+            message = f'{request.method} {request.path} ran {used} queries, budget is {budget}'
+            if self.strict or current_app.testing:
+                raise QueryBudgetExceeded(message)
+            current_app.logger.warning(message)
+        return response
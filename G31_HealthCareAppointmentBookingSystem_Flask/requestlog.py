@@ -0,0 +1,134 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import current_app, g, has_request_context, request
+from flask.logging import default_handler
+
+REQUEST_FIELDS = ('request_id', 'method', 'route', 'status', 'duration_ms')
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with the record's level, logger, message and
+    whatever request fields were attached to it."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        for field in REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.route = request.url_rule.rule if request.url_rule is not None else request.path
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of waiting when the queue is
+    full, and reports how many were dropped once there is room again."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                warning = logging.makeLogRecord({'name': record.name, 'levelno': logging.WARNING,
+                                                 'levelname': 'WARNING',
+                                                 'msg': f'{self.dropped} log records dropped, queue full'})
+                self.queue.put_nowait(warning)
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogging:
+    """Structured JSON logging for the app. Request threads only put records
+    on a bounded queue; a QueueListener thread formats them and writes the
+    rotating log file. Each request gets an id (taken from X-Request-ID when
+    the client sends one, echoed back in the response) and, with
+    LOG_REQUESTS on, one access record with its route, status and duration."""
+
+    def __init__(self, app=None):
+        self.listener = None
+        self.handler = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        path = app.config.setdefault('LOG_FILE', os.path.join('logs', 'app.log'))
+        max_bytes = app.config.setdefault('LOG_MAX_BYTES', 10 * 1024 * 1024)
+        backup_count = app.config.setdefault('LOG_BACKUP_COUNT', 5)
+        level = app.config.setdefault('LOG_LEVEL', 'INFO')
+        queue_size = app.config.setdefault('LOG_QUEUE_SIZE', 10000)
+        self.log_requests = app.config.setdefault('LOG_REQUESTS', True)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        file_handler.setFormatter(JSONFormatter())
+
+        self.handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+        self.handler.addFilter(RequestContextFilter())
+        self.listener = QueueListener(self.handler.queue, file_handler, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+
+        app.logger.removeHandler(default_handler)
+        app.logger.addHandler(self.handler)
+        app.logger.setLevel(level)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _start_request(self):
+        g.request_id = request.headers.get('X-Request-ID', '')[:128] or uuid.uuid4().hex
+        g.log_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        response.headers.setdefault('X-Request-ID', g.get('request_id', ''))
+        started = g.pop('log_started', None)
+        if self.log_requests and started is not None:
+            current_app.logger.info('request completed', extra={
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            })
+        return response
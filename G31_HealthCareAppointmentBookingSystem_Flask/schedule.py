@@ -0,0 +1,221 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+UNIT_MINUTES = 5
+DAY_MINUTES = 24 * 60
+WEEKDAYS = 7
+DEFAULT_SLOT_MINUTES = 60
+DEFAULT_HOURS = ((9 * 60, 18 * 60, DEFAULT_SLOT_MINUTES),)
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+@lru_cache(maxsize=4096)
+def span_mask(start, end):
+    """Bitmask with one bit per UNIT_MINUTES of the day covered by [start, end)."""
+    first, last = start // UNIT_MINUTES, -(-end // UNIT_MINUTES)
+    return ((1 << (last - first)) - 1) << first
+
+
+def format_slot_label(start, end):
+    return f'{format_minutes(start)} - {format_minutes(end)}'
+
+
+@lru_cache(maxsize=4096)
+def _parse_slot_label(label):
+    try:
+        start, end = (part.strip() for part in label.split('-'))
+        start_hour, start_minute = (int(part) for part in start.split(':'))
+        end_hour, end_minute = (int(part) for part in end.split(':'))
+    except ValueError:
+        raise ValueError(f'Invalid time slot: {label}')
+    start, end = start_hour * 60 + start_minute, end_hour * 60 + end_minute
+    if not (0 <= start_minute < 60 and 0 <= end_minute < 60 and 0 <= start < end <= DAY_MINUTES):
+        raise ValueError(f'Invalid time slot: {label}')
+    return start, end
+
+
+def parse_slot_label(label):
+    """``'09:00 - 10:00'`` (or ``'09:00-10:00'``) -> ``(540, 600)``."""
+    if not isinstance(label, str):
+        raise ValueError(f'Invalid time slot: {label}')
+    return _parse_slot_label(label)
+
+
+def label_mask(label):
+    return span_mask(*parse_slot_label(label))
+
+
+def slot_bounds(day, label):
+    """Start and end datetimes of slot ``label`` on ``day``. A label that
+    does not parse gets a zero-length span at midnight, so the row still
+    sorts and filters by its date but blocks nothing."""
+    day_start = datetime.combine(day, time.min)
+    try:
+        start, end = parse_slot_label(label)
+    except ValueError:
+        return day_start, day_start
+    return day_start + timedelta(minutes=start), day_start + timedelta(minutes=end)
+
+
+def day_bounds(first, last=None):
+    """``[first 00:00, day after last 00:00)``, for range scans on slot start times."""
+    return datetime.combine(first, time.min), datetime.combine(last or first, time.min) + timedelta(days=1)
+
+
+def interval_mask(starts_at, ends_at):
+    start = starts_at.hour * 60 + starts_at.minute
+    return span_mask(start, start + int((ends_at - starts_at).total_seconds()) // 60)
+
+
+class SlotTemplate:
+    """The bookable slots of one working day, compiled once from its
+    ``(start, end, slot_minutes)`` intervals; gaps between intervals are
+    breaks. ``open_mask`` covers the working time and each slot has a mask
+    over the units it spans, so a slot is free when its mask does not meet
+    the booked mask, even if bookings were made with another slot length."""
+
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self.open_mask = 0
+        slots = []
+        for start, end, slot_minutes in intervals:
+            self.open_mask |= span_mask(start, end)
+            for slot_start in range(start, end - slot_minutes + 1, slot_minutes):
+                slot_end = slot_start + slot_minutes
+                slots.append((slot_start, format_slot_label(slot_start, slot_end), span_mask(slot_start, slot_end)))
+        self.starts = tuple(start for start, _, _ in slots)
+        self.labels = tuple(label for _, label, _ in slots)
+        self.masks = tuple(mask for _, _, mask in slots)
+        self._labels_by_start = dict(zip(self.starts, self.labels))
+
+    def free(self, booked):
+        return [label for label, mask in zip(self.labels, self.masks) if not booked & mask]
+
+    def first_free(self, booked, after=-1):
+        for start, mask in zip(self.starts, self.masks):
+            if start > after and not booked & mask:
+                return start
+        return None
+
+    def label_at(self, start):
+        return self._labels_by_start[start]
+
+    def accepts(self, start, end):
+        return not span_mask(start, end) & ~self.open_mask
+
+
+@lru_cache(maxsize=1024)
+def compile_template(intervals):
+    """Shared SlotTemplate for a tuple of intervals, so doctors with the
+    same hours use one compiled template."""
+    return SlotTemplate(tuple(sorted(intervals)))
+
+
+CLOSED = compile_template(())
+DEFAULT_TEMPLATE = compile_template(DEFAULT_HOURS)
+
+
+class Schedule:
+    """A doctor's compiled week: one SlotTemplate per weekday (Monday is 0)
+    plus per-date templates for exceptions such as days off."""
+
+    def __init__(self, weekly, exceptions=None):
+        self.weekly = tuple(weekly)
+        self.exceptions = exceptions or {}
+
+    def template_for(self, day):
+        template = self.exceptions.get(day)
+        return template if template is not None else self.weekly[day.weekday()]
+
+
+DEFAULT_SCHEDULE = Schedule((DEFAULT_TEMPLATE,) * WEEKDAYS)
+
+
+def _interval(row):
+    return to_minutes(row.start_time), to_minutes(row.end_time), row.slot_minutes or DEFAULT_SLOT_MINUTES
+
+
+def build_schedule(hours, exceptions=()):
+    """Compile working-hours rows (``weekday, start_time, end_time,
+    slot_minutes``) and exception rows (``date, start_time, end_time,
+    slot_minutes``) into a Schedule. With no working hours at all the
+    default week applies; otherwise weekdays without rows are days off.
+    An exception row without times makes its date a day off, otherwise the
+    date's exception rows replace that weekday's hours."""
+    weekly = [[] for _ in range(WEEKDAYS)]
+    for row in hours:
+        weekly[row.weekday].append(_interval(row))
+    if not any(weekly):
+        weekly = [DEFAULT_HOURS] * WEEKDAYS
+    overrides = {}
+    for row in exceptions:
+        intervals = overrides.setdefault(row.date, [])
+        if intervals is not None:
+            overrides[row.date] = None if row.start_time is None or row.end_time is None else [*intervals, _interval(row)]
+    return Schedule(
+        [compile_template(tuple(intervals)) for intervals in weekly],
+        {day: compile_template(tuple(intervals or ())) for day, intervals in overrides.items()},
+    )
+
+
+class ScheduleCache:
+    """Compiled Schedule per doctor. ``loader(doctor_ids)`` returns
+    ``{doctor_id: Schedule}`` for the doctors that have working hours set;
+    the rest get DEFAULT_SCHEDULE. Entries stay until invalidate() is
+    called for the doctor, and a load that races with one is not stored."""
+
+    def __init__(self, loader, maxsize=100000):
+        self.loader = loader
+        self.maxsize = maxsize
+        self._schedules = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, doctor_id):
+        return self.get_many([doctor_id])[int(doctor_id)]
+
+    def get_many(self, doctor_ids):
+        schedules = {}
+        missing = []
+        with self._lock:
+            for doctor_id in doctor_ids:
+                doctor_id = int(doctor_id)
+                schedule = self._schedules.get(doctor_id)
+                if schedule is None:
+                    missing.append(doctor_id)
+                else:
+                    self._schedules.move_to_end(doctor_id)
+                    schedules[doctor_id] = schedule
+            generation = self._generation
+        if missing:
+            loaded = self.loader(missing)
+            loaded = {doctor_id: loaded.get(doctor_id, DEFAULT_SCHEDULE) for doctor_id in missing}
+            with self._lock:
+                if generation == self._generation:
+                    self._schedules.update(loaded)
+                    while len(self._schedules) > self.maxsize:
+                        self._schedules.popitem(last=False)
+            schedules.update(loaded)
+        return schedules
+
+    def invalidate(self, doctor_id):
+        with self._lock:
+            self._generation += 1
+            self._schedules.pop(int(doctor_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._schedules.clear()
+
+    def __len__(self):
+        return len(self._schedules)
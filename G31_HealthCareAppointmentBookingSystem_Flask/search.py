@@ -0,0 +1,57 @@
+import re
+
+SEARCH_TABLE = 'doctors_fts'
+SEARCH_COLUMNS = ('full_name', 'specialization', 'city')
+# bm25 weights per column: a name hit outranks a specialization hit, which outranks a city hit.
+SEARCH_RANK = 'bm25(10.0, 5.0, 1.0)'
+MAX_SEARCH_TERMS = 8
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5({_columns}, content='doctors', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON doctors BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON doctors BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF {_columns} ON doctors BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+)
+
+
+def search_index_exists(connection):
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+    ).first() is not None
+
+
+def create_search_index(connection):
+    """Create the doctor search index and the triggers that keep it in step
+    with the doctors table, filling it from existing rows if it is new."""
+    existed = search_index_exists(connection)
+    for statement in SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    if not existed:
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection):
+    connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', ?)", (SEARCH_RANK,))
+
+
+def drop_search_index(connection):
+    connection.exec_driver_sql(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query that requires every word, each
+    matched as a prefix: ``"card pun"`` -> ``"card"* "pun"*``."""
+    terms = re.findall(r'\w+', text.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise ValueError('q must contain at least one letter or digit')
+    return ' '.join(f'"{term}"*' for term in terms)
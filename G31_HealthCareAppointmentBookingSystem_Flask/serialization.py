@@ -0,0 +1,102 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import inspect
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def compile_serializer(model, fields):
+    """Generate a function that returns ``{field: value}`` for an instance of
+    ``model``, with date and datetime columns rendered in ISO format. Loaded
+    column values are read straight from the instance ``__dict__``; if one
+    is expired or deferred the generated code falls back to attribute access,
+    which loads it."""
+    columns = inspect(model).columns
+    fast, slow = [], []
+    for field in fields:
+        column = columns.get(field)
+        python_type = column.type.python_type if column is not None else None
+        fast_value = f"state[{field!r}]" if column is not None else f"obj.{field}"
+        for values, value in ((fast, fast_value), (slow, f"obj.{field}")):
+            if python_type in (date, datetime):
+                values.append(f"{field!r}: None if (value := {value}) is None else value.isoformat()")
+            else:
+                values.append(f"{field!r}: {value}")
+    source = (
+        "def serialize(obj):\n"
+        "    state = obj.__dict__\n"
+        "    try:\n"
+        "        return {" + ", ".join(fast) + "}\n"
+        "    except KeyError:\n"
+        "        return {" + ", ".join(slow) + "}\n"
+    )
+    namespace = {}
+    exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+    serialize = namespace['serialize']
+    serialize.fields = tuple(fields)
+    return serialize
+
+
+@lru_cache(maxsize=256)
+def row_serializer_for(model, fields):
+    """Serializer for result rows of ``query.with_entities(*columns)`` whose
+    leading columns are ``fields``, for list endpoints that skip building
+    ORM instances. Trailing columns (e.g. sort keys) are ignored."""
+    columns = inspect(model).columns
+    items = []
+    for position, field in enumerate(fields):
+        if columns[field].type.python_type in (date, datetime):
+            items.append(f"{field!r}: None if (value := row[{position}]) is None else value.isoformat()")
+        else:
+            items.append(f"{field!r}: row[{position}]")
+    source = "def serialize(row):\n    return {" + ", ".join(items) + "}\n"
+    namespace = {}
+    exec(compile(source, f"<row serializer {model.__name__}>", "exec"), namespace)
+    return namespace['serialize']
+
+
+class serializer:
+    """Model attribute that becomes a compiled serializer for ``fields`` the
+    first time it is used, once the mapper knows the column types::
+
+        to_dict = serializer('id', 'full_name', 'created_at')
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        serialize = compile_serializer(owner, self.fields)
+        setattr(owner, self.name, serialize)
+        return serialize if obj is None else serialize.__get__(obj, owner)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson when it is installed and
+    JSON_BACKEND is 'orjson', and with the standard library otherwise.
+    Calls that pass encoder options (e.g. ``indent`` in debug mode) always
+    use the standard library."""
+
+    sort_keys = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_BACKEND', 'orjson') == 'orjson'
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
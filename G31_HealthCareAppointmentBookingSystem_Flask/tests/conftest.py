@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+from itertools import count
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'doccure-test.db'))
+os.environ.setdefault('PASSWORD_POOL_WORKERS', '0')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-key-of-at-least-32-bytes')
+
+import app as doccure  # noqa: E402
+from search import create_search_index, drop_search_index  # noqa: E402
+
+CACHES = (doccure.principal_cache, doccure.doctor_response_cache, doccure.table_count_cache,
+          doccure.slot_index, doccure.schedule_cache, doccure.next_free_slots)
+
+
+@pytest.fixture
+def app():
+    """The Flask app on an empty database with cold caches, in testing
+    mode so that a view going over its query budget raises."""
+    flask_app = doccure.app
+    flask_app.testing = True
+    with flask_app.app_context():
+        with doccure.db.engine.begin() as connection:
+            drop_search_index(connection)
+        doccure.db.drop_all()
+        doccure.db.create_all()
+        with doccure.db.engine.begin() as connection:
+            create_search_index(connection)
+        doccure.db.session.remove()
+    for cache in CACHES:
+        cache.clear()
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _create(app, model, **values):
+    with app.app_context():
+        row = model(**values)
+        doccure.db.session.add(row)
+        doccure.db.session.commit()
+        return row.id
+
+
+@pytest.fixture
+def make_doctor(app):
+    numbers = count(1)
+
+    def make(**values):
+        number = next(numbers)
+        return _create(app, doccure.Doctor, **{
+            'full_name': f'Dr. Doctor {number}', 'email': f'doctor{number}@example.com', 'password_hash': 'x',
+            'specialization': 'Cardiology', 'city': 'Pune', 'fees': 500, **values,
+        })
+    return make
+
+
+@pytest.fixture
+def make_patient(app):
+    numbers = count(1)
+
+    def make(**values):
+        number = next(numbers)
+        return _create(app, doccure.User, **{
+            'full_name': f'Patient {number}', 'email': f'patient{number}@example.com', 'password_hash': 'x',
+            'role': 'patient', **values,
+        })
+    return make
+
+
+@pytest.fixture
+def admin_id(app):
+    return _create(app, doccure.Admin, full_name='Admin', email='admin@example.com', password_hash='x',
+                   role='super_admin', is_admin=True, is_super_admin=True)
+
+
+@pytest.fixture
+def auth(app):
+    """``auth('user', 3)`` -> headers with a bearer token for that principal."""
+    def headers(principal_type, principal_id):
+        with app.app_context():
+            return {'Authorization': 'Bearer ' + doccure.create_principal_token(principal_type, principal_id)}
+    return headers
+
+
+@pytest.fixture
+def book(client, auth):
+    def post(patient_id, doctor_id, day, time_slot, client=client):
+        return client.post('/api/appointments/', headers=auth('user', patient_id), json={
+            'doctor_id': doctor_id, 'appointment_date': day.isoformat(), 'time_slot': time_slot,
+            'illness': 'Checkup', 'first_name': 'Pat', 'last_name': 'Ient', 'contact': '9876543210',
+            'age': 40, 'gender': 'female',
+        })
+    return post
@@ -0,0 +1,22 @@
+from datetime import date, timedelta
+
+import app as doccure
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+def test_unknown_doctor_ids_are_404(client, make_doctor):
+    doctor_id = make_doctor()
+    response = client.get(f'/api/availability/?start={TOMORROW}&doctor_ids={doctor_id},{doctor_id + 1}')
+    assert response.status_code == 404
+    assert str(doctor_id + 1) in response.json['message']
+    assert client.get(f'/api/availability/?start={TOMORROW}&doctor_ids={doctor_id}').status_code == 200
+
+
+def test_too_many_matching_doctors_are_400(client, make_doctor):
+    for _ in range(doccure.AvailabilityResource.MAX_DOCTORS):
+        make_doctor(specialization='Neurology')
+    url = f'/api/availability/?start={TOMORROW}&specialization=Neurology'
+    assert len(client.get(url).json['availability']) == doccure.AvailabilityResource.MAX_DOCTORS
+    make_doctor(specialization='Neurology')
+    assert client.get(url).status_code == 400
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+import app as doccure
+
+CLIENTS = 24
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+def race(app, book, bookings):
+    """Send ``(patient_id, doctor_id, day, time_slot)`` bookings at once, each
+    from its own thread and test client, and count the status codes. Prints
+    the throughput (shown with ``pytest -s``)."""
+    barrier = threading.Barrier(len(bookings) + 1)
+    statuses = []
+
+    def attempt(booking, client):
+        barrier.wait()
+        statuses.append(book(*booking, client=client).status_code)
+
+    threads = [threading.Thread(target=attempt, args=(booking, app.test_client())) for booking in bookings]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f'{len(bookings)} bookings in {elapsed * 1000:.0f} ms: {len(bookings) / elapsed:.0f} bookings/s')
+    return Counter(statuses)
+
+
+def active_slots(app, doctor_id, day):
+    with app.app_context():
+        return [appointment.time_slot for appointment in doccure.Appointment.query.filter(
+            doccure.Appointment.doctor_id == doctor_id, doccure.Appointment.appointment_date == day,
+            doccure.Appointment.status != 'Cancelled')]
+
+
+@pytest.fixture
+def patients(make_patient):
+    return [make_patient() for _ in range(CLIENTS)]
+
+
+def test_one_booking_wins_the_same_slot(app, book, make_doctor, patients):
+    doctor_id = make_doctor()
+    slots = ['09:00 - 10:00', '10:00 - 11:00', '11:00 - 12:00', '14:00 - 15:00', '15:00 - 16:00']
+    for time_slot in slots:
+        statuses = race(app, book, [(patient, doctor_id, TOMORROW, time_slot) for patient in patients])
+        assert statuses == {201: 1, 409: CLIENTS - 1}, time_slot
+    assert sorted(active_slots(app, doctor_id, TOMORROW)) == slots
+
+
+def test_one_booking_wins_overlapping_slots(app, book, make_doctor, patients):
+    doctor_id = make_doctor()
+    statuses = race(app, book, [(patient, doctor_id, TOMORROW, ('09:00 - 10:00', '09:30 - 10:30')[number % 2])
+                                for number, patient in enumerate(patients)])
+    assert statuses == {201: 1, 409: CLIENTS - 1}
+    assert len(active_slots(app, doctor_id, TOMORROW)) == 1
+
+
+def test_slots_of_other_doctors_do_not_conflict(app, book, make_doctor, patients):
+    doctors = [make_doctor() for _ in range(CLIENTS // 2)]
+    statuses = race(app, book, [(patient, doctors[number % len(doctors)], TOMORROW, '11:00 - 12:00')
+                                for number, patient in enumerate(patients)])
+    assert statuses == {201: len(doctors), 409: CLIENTS - len(doctors)}
+    for doctor_id in doctors:
+        assert active_slots(app, doctor_id, TOMORROW) == ['11:00 - 12:00']
+
+
+def test_unique_index_stops_the_race_without_the_write_queue(app, book, make_doctor, patients, monkeypatch):
+    # Inline writes check the slot in concurrent transactions, so only the
+    # partial unique index stands between two identical bookings.
+    monkeypatch.setattr(doccure.write_queue, 'enabled', False)
+    doctor_id = make_doctor()
+    statuses = race(app, book, [(patient, doctor_id, TOMORROW, '09:00 - 10:00') for patient in patients])
+    assert statuses[201] == 1
+    assert statuses[201] + statuses[409] + statuses[503] == CLIENTS
+    assert active_slots(app, doctor_id, TOMORROW) == ['09:00 - 10:00']
+
+
+def test_only_slot_conflicts_on_update_are_409(app, client, auth, book, make_doctor, patients):
+    doctor_id = make_doctor()
+    first = book(patients[0], doctor_id, TOMORROW, '09:00 - 10:00').json['appointment']['id']
+    second = book(patients[1], doctor_id, TOMORROW, '10:00 - 11:00').json['appointment']['id']
+    conflict = client.put(f'/api/appointments/{second}/', headers=auth('user', patients[1]),
+                          json={'time_slot': '09:00 - 10:00'})
+    assert conflict.status_code == 409
+    missing = client.put(f'/api/appointments/{first}/', headers=auth('user', patients[0]), json={'illness': None})
+    assert missing.status_code == 400
+    assert sorted(active_slots(app, doctor_id, TOMORROW)) == ['09:00 - 10:00', '10:00 - 11:00']
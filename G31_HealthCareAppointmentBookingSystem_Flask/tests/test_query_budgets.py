@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import pytest
+
+import app as doccure
+from conftest import CACHES
+
+START = date.today() + timedelta(days=1)
+DOCTORS = 4
+PATIENTS = 5
+SLOTS = ('09:00 - 10:00', '10:00 - 11:00')
+
+
+@pytest.fixture
+def data(make_doctor, make_patient, admin_id, book):
+    """Every patient booked with every doctor: enough rows for a per-row
+    lazy load to blow any budget."""
+    doctors = [make_doctor(specialization=('Cardiology', 'Neurology')[number % 2], rating=4.0 + number / 10,
+                           experience=number) for number in range(DOCTORS)]
+    patients = [make_patient() for _ in range(PATIENTS)]
+    for offset, patient in enumerate(patients):
+        for doctor in doctors:
+            for time_slot in SLOTS:
+                assert book(patient, doctor, START + timedelta(days=offset), time_slot).status_code == 201
+    return {'doctors': doctors, 'patients': patients, 'admin': admin_id}
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Stands in for render_template, whose admin and appointments
+    templates are not in the tree. Touches the people of every row passed
+    in, as those templates would, so lazy loads are counted."""
+    calls = []
+
+    def render(template, **context):
+        for rows in context.values():
+            for row in rows if isinstance(rows, list) else ():
+                for relationship in ('doctor', 'patient'):
+                    getattr(row, relationship, None)
+        calls.append((template, context))
+        return template
+
+    monkeypatch.setattr(doccure, 'render_template', render)
+    return calls
+
+
+def get(client, url, **kwargs):
+    """GET on cold caches. The app fixture runs in testing mode, where a
+    view over its query budget raises QueryBudgetExceeded."""
+    for cache in CACHES:
+        cache.clear()
+    with doccure.query_budget.count() as counter:
+        response = client.get(url, **kwargs)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert counter.count, url
+    return response
+
+
+def log_in(client, principal_type, principal_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = f'{principal_type}:{principal_id}'
+        session['_fresh'] = True
+
+
+def test_budgets_are_strict_under_test(app):
+    assert app.testing
+
+
+def test_api_budgets(client, auth, data):
+    doctor, patient, admin = data['doctors'][0], data['patients'][0], data['admin']
+    days = f'start={START}&end={START + timedelta(days=PATIENTS)}'
+    as_patient = {'headers': auth('user', patient)}
+    as_doctor = {'headers': auth('doctor', doctor)}
+    urls = [
+        ('/api/doctors/', {}),
+        ('/api/doctors/?specialization=Cardiology&sort=-rating&limit=1', {}),
+        (f'/api/doctors/{doctor}/', {}),
+        (f'/api/availability/?{days}&doctor_ids={",".join(map(str, data["doctors"]))}', {}),
+        (f'/api/availability/?{days}&specialization=Neurology', {}),
+        ('/api/availability/first/?specialization=Cardiology', {}),
+        (f'/api/doctors/{doctor}/schedule/', {}),
+        ('/api/appointments/?status=Confirmed&sort=-appointment_date', as_doctor),
+        ('/api/appointments/', {'headers': auth('admin', admin)}),
+        ('/api/me/', as_doctor),
+        ('/api/changes?limit=100', {'headers': auth('admin', admin)}),
+    ]
+    for url, kwargs in urls:
+        get(client, url, **kwargs)
+    appointments = get(client, '/api/appointments/', **as_patient).json['appointments']
+    assert len(appointments) == DOCTORS * len(SLOTS)
+    get(client, f'/api/appointments/{appointments[0]["id"]}/', **as_patient)
+
+
+def test_page_budgets(app, client, data, rendered):
+    patient = data['patients'][0]
+    log_in(client, 'admin', data['admin'])
+    for url in ['/admin/dashboard', '/super-admin/dashboard', '/admin/appointments',
+                '/admin/appointments?status=Confirmed&sort=created_at',
+                f'/admin/appointments?doctor_id={data["doctors"][0]}',
+                '/admin/statistics', '/admin/doctors', '/admin/doctors?specialization=Cardiology',
+                '/admin/patients', f'/admin/patients/{patient}/appointments']:
+        get(client, url)
+    for principal in (('user', patient), ('doctor', data['doctors'][0])):
+        log_in(client, *principal)
+        get(client, '/appointments')
+    rows = [len(context['appointments']) for template, context in rendered if template == 'appointments.html']
+    assert rows == [DOCTORS * len(SLOTS), PATIENTS * len(SLOTS)]
@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+
+import pytest
+
+import app as doccure
+
+# Tables small enough by construction that scanning them is fine.
+SMALL_TABLES = ('counters',)
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+@pytest.fixture
+def data(make_doctor, make_patient, book):
+    doctors = [make_doctor(specialization=specialization, city=city, rating=rating, experience=experience)
+               for specialization, city, rating, experience in (
+                   ('Cardiology', 'Pune', 4.5, 10), ('Cardiology', 'Pune', 4.5, 3), ('Cardiology', 'Mumbai', None, 7),
+                   ('Neurology', 'Pune', 3.0, None), ('Neurology', 'Mumbai', 4.0, 12))]
+    patient = make_patient()
+    for offset, doctor_id in enumerate(doctors):
+        assert book(patient, doctor_id, TOMORROW + timedelta(days=offset), '09:00 - 10:00').status_code == 201
+        assert book(patient, doctor_id, TOMORROW + timedelta(days=offset), '10:00 - 11:00').status_code == 201
+    return {'doctors': doctors, 'patient': patient}
+
+
+def executed_plans(app, counter):
+    """``(sql, plan details)`` for each SELECT the request ran, explained
+    with the parameters it ran with."""
+    plans = []
+    with app.app_context(), doccure.db.engine.connect() as connection:
+        for statement, parameters in zip(counter.statements, counter.parameters):
+            if statement.lstrip().upper().startswith('SELECT'):
+                details = [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement,
+                                                                        tuple(parameters or ()))]
+                plans.append((statement, [detail for detail in details
+                                          if not detail.startswith(tuple(f'SCAN {table}' for table in SMALL_TABLES))]))
+    return plans
+
+
+def assert_indexed(app, client, url, headers=None, sorts=False):
+    for cache in (doccure.doctor_response_cache, doccure.slot_index, doccure.next_free_slots):
+        cache.clear()
+    with doccure.query_budget.count() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    plans = executed_plans(app, counter)
+    assert plans, f'{url} ran no queries'
+    for statement, details in plans:
+        problems = doccure.query_plan_problems(details, sorts)
+        assert not problems, f'{url}: {", ".join(problems)} in\n{statement}\n{details}'
+    return response
+
+
+@pytest.mark.parametrize('query', [
+    'specialization=Cardiology',
+    'city=Pune&sort=-experience',
+    'specialization=Neurology&sort=rating',
+    'sort=-rating',
+    'sort=experience',
+])
+def test_doctor_list_queries_use_indexes(app, client, data, query):
+    first = assert_indexed(app, client, f'/api/doctors/?limit=1&{query}').json
+    assert first['next_cursor']
+    assert_indexed(app, client, f'/api/doctors/?limit=1&{query}&cursor={first["next_cursor"]}')
+
+
+@pytest.mark.parametrize('query', ['q=cardio%20pune', 'name=dr.%20doctor'])
+def test_doctor_text_lookups_only_sort_their_matches(app, client, data, query):
+    first = assert_indexed(app, client, f'/api/doctors/?limit=1&{query}', sorts=True).json
+    assert first['next_cursor']
+    assert_indexed(app, client, f'/api/doctors/?limit=1&{query}&cursor={first["next_cursor"]}', sorts=True)
+
+
+def test_appointment_list_queries_use_indexes(app, client, auth, data):
+    patient = auth('user', data['patient'])
+    doctor = auth('doctor', data['doctors'][0])
+    first = assert_indexed(app, client, '/api/appointments/?limit=2', patient).json
+    assert_indexed(app, client, f'/api/appointments/?limit=2&cursor={first["next_cursor"]}', patient)
+    assert_indexed(app, client, f'/api/appointments/?from={TOMORROW}&to={TOMORROW + timedelta(days=3)}'
+                                f'&status=Confirmed', patient)
+    assert_indexed(app, client, f'/api/appointments/?sort=-appointment_date&from={TOMORROW}', doctor)
+
+
+def test_availability_queries_use_indexes(app, client, data):
+    doctor_id = data['doctors'][0]
+    assert_indexed(app, client, f'/api/doctors/{doctor_id}/slots?date={TOMORROW}')
+    assert_indexed(app, client, f'/api/availability/?start={TOMORROW}&end={TOMORROW + timedelta(days=6)}'
+                                f'&doctor_ids={",".join(map(str, data["doctors"]))}')
+    assert_indexed(app, client, '/api/availability/first/?specialization=Cardiology&days=7')
+
+
+def test_change_feed_query_uses_primary_key(app, client, auth, admin_id, data):
+    first = assert_indexed(app, client, '/api/changes?after=0&limit=5', auth('admin', admin_id)).json
+    assert_indexed(app, client, f'/api/changes?after={first["last_seq"]}&limit=5', auth('admin', admin_id))
+
+
+def test_login_looks_up_identity_by_email(app, client):
+    assert client.post('/api/register/', json={'email': 'new@example.com', 'password': 'secret',
+                                               'full_name': 'New Patient'}).status_code == 201
+    doccure.principal_cache.clear()
+    with doccure.query_budget.count() as counter:
+        assert client.post('/api/login/', json={'email': 'new@example.com', 'password': 'secret'}).status_code == 200
+    plans = executed_plans(app, counter)
+    assert len(plans) == 1, [statement for statement, _ in plans]
+    for statement, details in plans:
+        assert not doccure.query_plan_problems(details), f'{statement}\n{details}'
+
+
+def test_hot_queries_use_indexes(app):
+    with app.app_context(), doccure.db.engine.connect() as connection:
+        for name, query in doccure.hot_queries().items():
+            details = doccure.query_plan(connection, query)
+            assert not doccure.query_plan_problems(details, name in doccure.SORTED_HOT_QUERIES), (name, details)
@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from blinker import Namespace
+
+signals = Namespace()
+batch_committed = signals.signal('batch-committed')
+
+
+class WriteQueue:
+    """Funnels database writes through one writer thread. Jobs that queue up
+    while a transaction is committing are applied together in the next
+    transaction (group commit), each inside its own savepoint so a failing
+    job does not undo the others. A job is a callable that works on
+    ``db.session`` and returns plain data; it must not commit. The caller's
+    own read transaction is ended once the job is done so that its next
+    query sees the write. A job still queued after ``timeout`` seconds is
+    cancelled and the caller gets TimeoutError; one the writer has already
+    started is waited for. ``batch_committed`` is sent after every batch with
+    its size, how long each job waited in the queue and the commit time."""
+
+    def __init__(self, app=None, db=None):
+        self.enabled = True
+        self.max_batch = 64
+        self.timeout = 10
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        self.enabled = app.config.setdefault('SQLITE_WRITE_QUEUE', self.enabled)
+        self.max_batch = app.config.setdefault('SQLITE_WRITE_BATCH', self.max_batch)
+        self.timeout = app.config.setdefault('SQLITE_WRITE_TIMEOUT', self.timeout)
+
+    def in_writer(self):
+        return threading.current_thread() is self._thread
+
+    def run(self, job):
+        if self.in_writer():
+            return job()
+        if not self.enabled:
+            return self._run_inline(job)
+        self._ensure_started()
+        future = Future()
+        self._queue.put((job, future, time.monotonic()))
+        try:
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                if future.cancel():
+                    raise
+            # The writer already picked the job up, so it may still commit;
+            # report its real outcome rather than a failure.
+            return future.result()
+        finally:
+            self.db.session.rollback()
+
+    def _run_inline(self, job):
+        try:
+            result = job()
+            self.db.session.commit()
+            return result
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._work, name='db-writer', daemon=True)
+                    self._thread.start()
+
+    def _work(self):
+        with self.app.app_context():
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._commit_batch(batch)
+                finally:
+                    self.db.session.remove()
+
+    def _commit_batch(self, batch):
+        session = self.db.session
+        started = time.monotonic()
+        outcomes = []
+        for job, future, _ in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with session.begin_nested():
+                    outcomes.append((future, job(), None))
+            except Exception as e:
+                outcomes.append((future, None, e))
+        try:
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            outcomes = [(future, None, e) for future, _, _ in outcomes]
+        batch_committed.send(self, size=len(batch), waits=[started - enqueued for _, _, enqueued in batch],
+                             seconds=time.monotonic() - started)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)